@@ -184,6 +184,10 @@ async def send_message():
             # Prepare additional parameters based on chat mode
             generate_kwargs = {}
 
+            # Only the question is compared by providers with a semantic cache;
+            # the retrieved context has to match exactly
+            generate_kwargs['semantic_cache_query'] = message
+
             # Set max completion tokens if provided
             if data.get('max_completion_tokens'):
                 generate_kwargs['max_completion_tokens'] = data.get('max_completion_tokens')
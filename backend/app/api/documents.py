@@ -161,4 +161,21 @@ def view_document(doc_id):
 
     except Exception as e:
         logger.error(f"Error viewing document {doc_id}: {e}")
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@documents_bp.route('/documents/<doc_id>/embedding-status', methods=['GET'])
+@timing_logger('app.api.documents')
+def get_embedding_status(doc_id):
+    """Get the status of the background embedding job for a document"""
+    try:
+        from app.services.ingestion.embedding_queue import get_embedding_queue
+
+        job = get_embedding_queue().get_job_for_document(doc_id)
+        if not job:
+            return jsonify({'error': 'No embedding job found for document'}), 404
+
+        return jsonify(job.to_dict()), 200
+
+    except Exception as e:
+        logger.error(f"Error getting embedding status for document {doc_id}: {e}")
+        return jsonify({'error': str(e)}), 500
@@ -14,6 +14,16 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Rows per multi-row INSERT when inserting many rows; psycopg2 (the default
+    # postgresql:// driver) also batches other executemany statements
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'executemany_mode': 'values_plus_batch',
+        'insertmanyvalues_page_size': 1000,
+        'executemany_batch_page_size': 1000
+    } if SQLALCHEMY_DATABASE_URI.startswith(('postgresql://', 'postgresql+psycopg2://')) else {
+        'insertmanyvalues_page_size': 1000
+    }
+    
     # Security
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     
@@ -35,6 +45,26 @@ class Config:
     GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
     OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY')
     
+    # Client-side OpenAI rate limits (requests / tokens per minute, 0 disables)
+    OPENAI_RPM = int(os.getenv('OPENAI_RPM', 0))
+    OPENAI_TPM = int(os.getenv('OPENAI_TPM', 0))
+    
+    # Documents with at least this many paragraphs to embed use the provider's bulk
+    # path, e.g. the half-price OpenAI Batch API (0 disables). Batch jobs may take
+    # up to 24 hours, and the embedding queue waits for them.
+    EMBEDDING_BULK_MIN_PARAGRAPHS = int(os.getenv('EMBEDDING_BULK_MIN_PARAGRAPHS', 0))
+    
+    # Reuse OpenAI answers for paraphrased questions above this cosine similarity (0 disables)
+    OPENAI_SEMANTIC_CACHE_THRESHOLD = float(os.getenv('OPENAI_SEMANTIC_CACHE_THRESHOLD', 0))
+    
+    # OpenRouter model catalog cache (empty path disables it) and its lifetime in seconds
+    OPENROUTER_MODELS_CACHE_PATH = os.getenv(
+        'OPENROUTER_MODELS_CACHE_PATH',
+        '~/.deepcite/cache/openrouter_models.json'
+    )
+    OPENROUTER_MODELS_CACHE_TTL = int(os.getenv('OPENROUTER_MODELS_CACHE_TTL', 86400))
+    OPENROUTER_DISABLE_REMOTE_MODELS = os.getenv('OPENROUTER_DISABLE_REMOTE_MODELS', 'false').lower() == 'true'
+    
     # Local Model Configuration
     OLLAMA_ENDPOINT = os.getenv('OLLAMA_ENDPOINT', 'http://localhost:11434')
     LLAMACPP_ENDPOINT = os.getenv('LLAMACPP_ENDPOINT', 'http://localhost:8080')
@@ -63,7 +93,10 @@ class Config:
                 'type': 'openai',
                 'api_key': self.OPENAI_API_KEY,
                 'timeout': 30,
-                'max_retries': 3
+                'max_retries': 3,
+                'rpm': self.OPENAI_RPM,
+                'tpm': self.OPENAI_TPM,
+                'semantic_cache_threshold': self.OPENAI_SEMANTIC_CACHE_THRESHOLD
             }
             
         # Add Perplexity provider if API key is available
@@ -80,7 +113,10 @@ class Config:
                 'type': 'openrouter',
                 'api_key': self.OPENROUTER_API_KEY,
                 'timeout': 30,
-                'max_retries': 3
+                'max_retries': 3,
+                'models_cache_path': self.OPENROUTER_MODELS_CACHE_PATH,
+                'models_cache_ttl': self.OPENROUTER_MODELS_CACHE_TTL,
+                'disable_remote_models': self.OPENROUTER_DISABLE_REMOTE_MODELS
             }
         
         # Add other providers as they become available
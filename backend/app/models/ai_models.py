@@ -1,6 +1,7 @@
 """
 AI Models and related data structures for the DeepCite system
 """
+import functools
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import List, Dict, Any, Optional
@@ -299,6 +300,11 @@ def get_embedding_models() -> List[ModelInfo]:
     """Get all embedding models"""
     return get_models_by_type(ModelType.EMBEDDING)
 
+@functools.lru_cache(maxsize=1)
+def get_embedding_model_ids() -> frozenset:
+    """Get the IDs of all embedding models, cached until the registry changes"""
+    return frozenset(model.id for model in get_embedding_models())
+
 def get_reranking_models() -> List[ModelInfo]:
     """Get all reranking models"""
     return get_models_by_type(ModelType.RERANKING)
@@ -310,10 +316,12 @@ def is_model_available(model_id: str) -> bool:
 def add_model_to_registry(model_info: ModelInfo) -> None:
     """Add a new model to the registry"""
     MODEL_REGISTRY[model_info.id] = model_info
+    get_embedding_model_ids.cache_clear()
 
 def remove_model_from_registry(model_id: str) -> bool:
     """Remove a model from the registry"""
     if model_id in MODEL_REGISTRY:
         del MODEL_REGISTRY[model_id]
+        get_embedding_model_ids.cache_clear()
         return True
     return False
\ No newline at end of file
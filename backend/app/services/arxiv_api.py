@@ -6,6 +6,8 @@ import httpx
 from typing import List, Dict, Any, Optional
 from xml.etree import ElementTree as ET
 
+from app.services.llm.model_providers.base import SSL_CONTEXT
+
 logger = logging.getLogger(__name__)
 
 
@@ -61,7 +63,7 @@ class ArxivApiService:
             search_params['sortOrder'] = params['sortOrder']
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with httpx.AsyncClient(timeout=30.0, verify=SSL_CONTEXT) as client:
                 response = await client.get(
                     self.base_url,
                     params=search_params,
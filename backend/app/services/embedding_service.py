@@ -1,20 +1,76 @@
 """
 Embedding service for generating and managing document embeddings
 """
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from collections import defaultdict
+from typing import List, Dict, Any, Callable, Iterator, Optional
+import numpy as np
 import chromadb
+import chromadb.errors
 from chromadb.config import Settings
 
 from app.models.embedding import Embedding
 from app.models.paragraph import Paragraph
 from app.services.llm.model_provider_manager import ModelProviderManager
-from app.models.ai_models import get_embedding_models, ModelInfo, EmbeddingResult
+from app.models.ai_models import get_embedding_models, get_embedding_model_ids, ModelInfo, EmbeddingResult
 from app import db
 from flask import current_app
 
 logger = logging.getLogger(__name__)
 
+# HNSW index parameters applied when a collection is created. Embeddings are
+# written once in large batches during ingestion, so the index is flushed to
+# disk less often than with Chroma's defaults.
+HNSW_COLLECTION_METADATA = {
+    'hnsw:construction_ef': 100,
+    'hnsw:M': 16,
+    'hnsw:batch_size': 1000,
+    'hnsw:sync_threshold': 10000,
+}
+
+# Errors raised when a cached collection handle refers to a collection that was
+# deleted or recreated; the available names differ between chromadb releases
+STALE_COLLECTION_ERRORS = tuple(
+    getattr(chromadb.errors, name)
+    for name in ('InvalidCollectionException', 'NotFoundError')
+    if hasattr(chromadb.errors, name)
+)
+
+
+# Per-thread event loop for synchronous embedding calls. Reusing the loop keeps
+# the providers' pooled HTTP connections alive between batches.
+_thread_state = threading.local()
+
+
+def _get_thread_event_loop() -> asyncio.AbstractEventLoop:
+    """Get this thread's embedding event loop, creating it on first use"""
+    loop = getattr(_thread_state, 'loop', None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _thread_state.loop = loop
+    return loop
+
+
+def _distances_to_scores(distances: List[float], space: str) -> np.ndarray:
+    """
+    Convert ChromaDB distances to cosine similarity scores
+    
+    Args:
+        distances: Distances returned by a collection query
+        space: HNSW distance function of the collection ('l2', 'cosine' or 'ip')
+        
+    Returns:
+        Array of similarity scores, higher is more similar
+    """
+    distances = np.asarray(distances, dtype=np.float64)
+    if space == 'l2':
+        # Squared L2 distance between unit vectors is 2 - 2 * cos
+        return 1.0 - 0.5 * distances
+    # Cosine distance is 1 - cos, inner product distance is 1 - dot
+    return 1.0 - distances
+
 
 class EmbeddingService:
     """Service for generating and managing embeddings with different models"""
@@ -22,6 +78,7 @@ class EmbeddingService:
     def __init__(self):
         self.model_manager = None
         self.chroma_client = None
+        self._collections: Dict[str, Any] = {}
         self._initialized = False
     
     def _initialize_chroma(self):
@@ -62,9 +119,37 @@ class EmbeddingService:
             self._initialize_model_manager()
             self._initialized = True
     
-    def _generate_embeddings_sync(self, texts: List[str], model_id: str) -> EmbeddingResult:
-        """Synchronous wrapper for generating embeddings"""
-        import asyncio
+    @staticmethod
+    def _collection_name_for_model(model_id: str) -> str:
+        """Get the ChromaDB collection name used for an embedding model"""
+        return f"embeddings_{model_id.replace('-', '_').replace('/', '_')}"
+    
+    def _get_collection(self, collection_name: str, model_id: Optional[str] = None):
+        """
+        Get a ChromaDB collection handle, reusing handles cached on this service
+        
+        Args:
+            collection_name: Name of the ChromaDB collection
+            model_id: Embedding model of the collection; when given, the collection
+                is created if it does not exist yet
+            
+        Returns:
+            ChromaDB collection
+        """
+        collection = self._collections.get(collection_name)
+        if collection is None:
+            if model_id:
+                collection = self.chroma_client.get_or_create_collection(
+                    name=collection_name,
+                    metadata={"embedding_model": model_id, **HNSW_COLLECTION_METADATA}
+                )
+            else:
+                collection = self.chroma_client.get_collection(collection_name)
+            self._collections[collection_name] = collection
+        return collection
+    
+    def _generate_embeddings_sync(self, texts: List[str], model_id: str, bulk: bool = False) -> EmbeddingResult:
+        """Synchronous wrapper for generating embeddings, through the bulk path when bulk is set"""
         import concurrent.futures
         
         # Check if there's already an event loop running
@@ -72,37 +157,37 @@ class EmbeddingService:
             loop = asyncio.get_running_loop()
             # If we're in an async context, use a thread pool
             with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(self._run_embed_in_new_loop, texts, model_id)
+                future = executor.submit(self._run_embed_in_new_loop, texts, model_id, bulk)
                 return future.result()
         except RuntimeError:
-            # No event loop running, we can create one
-            loop = asyncio.new_event_loop()
+            # No event loop running, reuse this thread's loop
+            loop = _get_thread_event_loop()
             asyncio.set_event_loop(loop)
-            try:
-                return loop.run_until_complete(
-                    self.model_manager.embed(texts, model_id)
-                )
-            finally:
-                loop.close()
+            return loop.run_until_complete(self._embed(texts, model_id, bulk))
     
-    def _run_embed_in_new_loop(self, texts: List[str], model_id: str) -> EmbeddingResult:
+    def _run_embed_in_new_loop(self, texts: List[str], model_id: str, bulk: bool = False) -> EmbeddingResult:
         """Run embedding in a new event loop (for thread pool execution)"""
-        import asyncio
-        
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         try:
-            return loop.run_until_complete(
-                self.model_manager.embed(texts, model_id)
-            )
+            return loop.run_until_complete(self._embed(texts, model_id, bulk))
         finally:
+            # Lets the providers close their HTTP clients for this loop
+            loop.run_until_complete(loop.shutdown_asyncgens())
             loop.close()
     
+    def _embed(self, texts: List[str], model_id: str, bulk: bool):
+        """Embedding coroutine of the model manager for regular or bulk requests"""
+        if bulk:
+            return self.model_manager.embed_bulk(texts, model_id)
+        return self.model_manager.embed(texts, model_id)
+    
     def generate_embeddings_for_paragraphs(
         self,
         paragraphs: List[Paragraph],
         model_id: Optional[str] = None,
-        batch_size: int = 100
+        batch_size: int = 100,
+        should_stop: Optional[Callable[[], bool]] = None
     ) -> bool:
         """
         Generate embeddings for a list of paragraphs using specified model
@@ -111,6 +196,8 @@ class EmbeddingService:
             paragraphs: List of paragraph objects
             model_id: Embedding model to use (defaults to configured default)
             batch_size: Number of paragraphs to process in each batch
+            should_stop: Checked before each batch; when it returns True the
+                remaining paragraphs are skipped and finished batches are kept
 
         Returns:
             True if successful, False otherwise
@@ -126,51 +213,88 @@ class EmbeddingService:
 
         try:
             # Validate model is available
-            available_models = {m.id for m in self.get_available_embedding_models()}
+            self._ensure_initialized()
+            available_models = get_embedding_model_ids()
             if model_id not in available_models:
                 logger.error(f"Embedding model {model_id} not available. Available models: {available_models}")
                 return False
 
-            # Filter out paragraphs that already have embeddings for this model
-            para_ids = [p.para_id for p in paragraphs]
-            existing_embeddings = db.session.query(Embedding.para_id).filter(
-                Embedding.para_id.in_(para_ids),
-                Embedding.model == model_id
-            ).all()
+            # Find paragraphs that already have embeddings for this model
+            existing_para_ids = {
+                para_id for (para_id,) in db.session.query(Embedding.para_id).filter(
+                    Embedding.para_id.in_([p.para_id for p in paragraphs]),
+                    Embedding.model == model_id
+                )
+            }
 
-            existing_para_ids = {emb.para_id for emb in existing_embeddings}
+            # Drop them and order the rest by length in a single pass, so each batch
+            # holds paragraphs of similar size, which keeps padding low for providers
+            # that pad to the longest input
+            paragraphs = sorted(
+                (p for p in paragraphs if p.para_id not in existing_para_ids),
+                key=lambda p: p.tokens or len(p.text)
+            )
 
             if existing_para_ids:
                 logger.info(f"Found {len(existing_para_ids)} paragraphs that already have embeddings for model {model_id}")
-                # Filter out paragraphs that already have embeddings
-                paragraphs_to_process = [p for p in paragraphs if p.para_id not in existing_para_ids]
-                if not paragraphs_to_process:
+                if not paragraphs:
                     logger.info("All paragraphs already have embeddings, skipping generation")
                     return True
-                paragraphs = paragraphs_to_process
                 logger.info(f"Processing {len(paragraphs)} new paragraphs")
 
             # Get or create ChromaDB collection for this model
-            collection_name = f"embeddings_{model_id.replace('-', '_').replace('/', '_')}"
-            collection = self.chroma_client.get_or_create_collection(
-                name=collection_name,
-                metadata={"embedding_model": model_id}
-            )
+            collection_name = self._collection_name_for_model(model_id)
+            collection = self._get_collection(collection_name, model_id)
+
+            # Large documents can be embedded in one bulk request up front;
+            # batches then only write the vectors
+            bulk_embeddings = None
+            bulk_min = current_app.config.get('EMBEDDING_BULK_MIN_PARAGRAPHS', 0)
+            if bulk_min and len(paragraphs) >= bulk_min:
+                try:
+                    bulk_result = self._generate_embeddings_sync([p.text for p in paragraphs], model_id, bulk=True)
+                    if bulk_result.success:
+                        bulk_embeddings = bulk_result.embeddings
+                    else:
+                        logger.warning(f"Bulk embedding failed, using regular requests: {bulk_result.error}")
+                except Exception as e:
+                    logger.warning(f"Bulk embedding failed, using regular requests: {e}")
 
             # Process paragraphs in batches
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
+            failed = []
+            succeeded = 0
+            n_batches = 0
             for i in range(0, len(paragraphs), batch_size):
+                if should_stop is not None and should_stop():
+                    logger.info(f"Stopping embedding generation after {succeeded} paragraphs")
+                    break
                 batch = paragraphs[i:i + batch_size]
+                n_batches += 1
 
                 try:
-                    self._process_paragraph_batch(batch, model_id, collection)
+                    self._process_paragraph_batch(
+                        batch, model_id, collection,
+                        embeddings=bulk_embeddings[i:i + batch_size] if bulk_embeddings is not None else None
+                    )
+                    succeeded += len(batch)
                 except Exception as e:
-                    logger.error(f"Error processing batch {i//batch_size + 1}: {e}")
                     # Continue with next batch rather than failing completely
-                    continue
+                    failed.append((n_batches, str(e)))
+                    if debug_enabled:
+                        logger.debug("Error processing batch %d: %s", n_batches, e)
 
             # Commit all embedding records to database
             db.session.commit()
-            logger.info(f"Successfully generated embeddings for {len(paragraphs)} paragraphs using {model_id}")
+            logger.info(
+                "Embedded %d paragraphs across %d batches using %s, %d batches failed",
+                succeeded, n_batches, model_id, len(failed)
+            )
+            if failed:
+                logger.error(
+                    "Failed embedding batches for model %s: %s (first error: %s)",
+                    model_id, [batch_number for batch_number, _ in failed], failed[0][1]
+                )
             return True
 
         except Exception as e:
@@ -182,18 +306,20 @@ class EmbeddingService:
         self, 
         batch: List[Paragraph], 
         model_id: str, 
-        collection
+        collection,
+        embeddings: Optional[List[List[float]]] = None
     ):
-        """Process a batch of paragraphs for embedding generation"""
-        texts = [p.text for p in batch]
+        """Process a batch of paragraphs for embedding generation, reusing precomputed embeddings if given"""
         ids = [p.para_id for p in batch]
         
-        # Generate embeddings using the model provider
-        self._ensure_initialized()
-        embedding_result = self._generate_embeddings_sync(texts, model_id)
-        
-        if not embedding_result.success:
-            raise Exception(f"Failed to generate embeddings: {embedding_result.error}")
+        if embeddings is None:
+            # Generate embeddings using the model provider
+            self._ensure_initialized()
+            embedding_result = self._generate_embeddings_sync([p.text for p in batch], model_id)
+            
+            if not embedding_result.success:
+                raise Exception(f"Failed to generate embeddings: {embedding_result.error}")
+            embeddings = embedding_result.embeddings
         
         # Prepare metadata for ChromaDB
         metadatas = []
@@ -208,10 +334,9 @@ class EmbeddingService:
             }
             metadatas.append(metadata)
         
-        # Add to ChromaDB
+        # Add to ChromaDB (paragraph text stays in the SQL database only)
         collection.add(
-            documents=texts,
-            embeddings=embedding_result.embeddings,
+            embeddings=embeddings,
             metadatas=metadatas,
             ids=ids
         )
@@ -239,38 +364,43 @@ class EmbeddingService:
         try:
             self._ensure_initialized()
             
-            # Get all embeddings for this document
-            embeddings = db.session.query(Embedding).join(Paragraph).filter(
+            # Get Chroma ids for this document's embeddings (column projection, no ORM objects)
+            rows = db.session.query(Embedding.chroma_id, Embedding.collection_name).join(Paragraph).filter(
                 Paragraph.doc_id == doc_id
             ).all()
             
-            if not embeddings:
+            if not rows:
                 logger.info(f"No embeddings found for document {doc_id}")
                 return True
             
             # Group by collection name
-            collections_to_clean = {}
-            for embedding in embeddings:
-                collection_name = embedding.collection_name
-                if collection_name not in collections_to_clean:
-                    collections_to_clean[collection_name] = []
-                collections_to_clean[collection_name].append(embedding.chroma_id)
+            collections_to_clean = defaultdict(list)
+            for chroma_id, collection_name in rows:
+                collections_to_clean[collection_name].append(chroma_id)
             
             # Delete from ChromaDB collections
             for collection_name, chroma_ids in collections_to_clean.items():
                 try:
-                    collection = self.chroma_client.get_collection(collection_name)
+                    collection = self._get_collection(collection_name)
                     collection.delete(ids=chroma_ids)
-                    logger.info(f"Deleted {len(chroma_ids)} embeddings from collection {collection_name}")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Deleted %d embeddings from collection %s", len(chroma_ids), collection_name)
                 except Exception as e:
                     logger.error(f"Error deleting from ChromaDB collection {collection_name}: {e}")
+                    # Drop the cached handle in case the collection was removed or recreated
+                    self._collections.pop(collection_name, None)
             
             # Delete embedding records from database
-            for embedding in embeddings:
-                db.session.delete(embedding)
+            para_ids = db.session.query(Paragraph.para_id).filter(Paragraph.doc_id == doc_id)
+            db.session.query(Embedding).filter(
+                Embedding.para_id.in_(para_ids.scalar_subquery())
+            ).delete(synchronize_session=False)
             
             db.session.commit()
-            logger.info(f"Successfully deleted all embeddings for document {doc_id}")
+            logger.info(
+                "Deleted %d embeddings for document %s across %d collections",
+                len(rows), doc_id, len(collections_to_clean)
+            )
             return True
             
         except Exception as e:
@@ -283,7 +413,8 @@ class EmbeddingService:
         query_text: str, 
         model_id: Optional[str] = None,
         n_results: int = 10,
-        doc_ids: Optional[List[str]] = None
+        doc_ids: Optional[List[str]] = None,
+        return_scores: bool = True
     ) -> List[Dict[str, Any]]:
         """
         Search for similar paragraphs using embedding similarity
@@ -293,10 +424,37 @@ class EmbeddingService:
             model_id: Embedding model to use for search
             n_results: Number of results to return
             doc_ids: Optional list of document IDs to limit search to
+            return_scores: Whether to convert distances to similarity scores
+                (score is None otherwise)
             
         Returns:
             List of similar paragraphs with scores
         """
+        return list(self.iter_similar_paragraphs(
+            query_text,
+            model_id=model_id,
+            n_results=n_results,
+            doc_ids=doc_ids,
+            return_scores=return_scores
+        ))
+    
+    def iter_similar_paragraphs(
+        self, 
+        query_text: str, 
+        model_id: Optional[str] = None,
+        n_results: int = 10,
+        doc_ids: Optional[List[str]] = None,
+        return_scores: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Search for similar paragraphs, yielding results one at a time in rank order
+        
+        Takes the same arguments as search_similar_paragraphs. Errors are logged
+        and end the iteration instead of being raised.
+        
+        Yields:
+            Similar paragraph dicts with para_id, text, score and metadata
+        """
         if not model_id:
             model_id = self.get_default_embedding_model()
         
@@ -304,20 +462,19 @@ class EmbeddingService:
             self._ensure_initialized()
             
             # Get collection for this model
-            collection_name = f"embeddings_{model_id.replace('-', '_').replace('/', '_')}"
+            collection_name = self._collection_name_for_model(model_id)
             try:
-                collection = self.chroma_client.get_collection(collection_name)
+                collection = self._get_collection(collection_name)
             except Exception as e:
                 logger.error(f"Collection {collection_name} not found: {e}")
-                return []
+                return
             
             # Generate embedding for query
-            self._ensure_initialized()
             embedding_result = self._generate_embeddings_sync([query_text], model_id)
             
             if not embedding_result.success:
                 logger.error(f"Failed to generate query embedding: {embedding_result.error}")
-                return []
+                return
             
             # Prepare where clause for document filtering
             where_clause = None
@@ -325,28 +482,48 @@ class EmbeddingService:
                 where_clause = {"doc_id": {"$in": doc_ids}}
             
             # Search in ChromaDB
-            results = collection.query(
-                query_embeddings=embedding_result.embeddings,
-                n_results=n_results,
-                where=where_clause
-            )
-            
-            # Format results
-            similar_paragraphs = []
-            if results['ids'] and results['ids'][0]:
-                for i, para_id in enumerate(results['ids'][0]):
-                    similar_paragraphs.append({
-                        'para_id': para_id,
-                        'text': results['documents'][0][i],
-                        'score': 2 - results['distances'][0][i],  # Convert distance to similarity
-                        'metadata': results['metadatas'][0][i]
-                    })
+            try:
+                results = collection.query(
+                    query_embeddings=embedding_result.embeddings,
+                    n_results=n_results,
+                    where=where_clause,
+                    include=['metadatas', 'distances']
+                )
+            except STALE_COLLECTION_ERRORS:
+                # Drop the stale handle so the next search looks the collection up again
+                self._collections.pop(collection_name, None)
+                raise
             
-            return similar_paragraphs
+            if not results['ids'] or not results['ids'][0]:
+                return
             
+            # Load paragraph text from the database in one query
+            para_ids = results['ids'][0]
+            metadatas = results['metadatas'][0]
+            scores = None
+            if return_scores:
+                space = (collection.metadata or {}).get('hnsw:space', 'l2')
+                scores = _distances_to_scores(results['distances'][0], space).tolist()
+            paragraphs_by_id = {
+                p.para_id: p for p in db.session.query(Paragraph).filter(
+                    Paragraph.para_id.in_(para_ids)
+                ).all()
+            }
         except Exception as e:
             logger.error(f"Error searching similar paragraphs: {e}")
-            return []
+            return
+        
+        for i, para_id in enumerate(para_ids):
+            paragraph = paragraphs_by_id.get(para_id)
+            if paragraph is None:
+                logger.warning(f"Paragraph {para_id} found in ChromaDB but not in database")
+                continue
+            yield {
+                'para_id': para_id,
+                'text': paragraph.text,
+                'score': scores[i] if scores is not None else None,
+                'metadata': metadatas[i]
+            }
     
     def get_embedding_stats(self) -> Dict[str, Any]:
         """Get statistics about embeddings in the system"""
@@ -367,7 +544,7 @@ class EmbeddingService:
             
             for collection in collections:
                 try:
-                    coll = self.chroma_client.get_collection(collection.name)
+                    coll = self._get_collection(collection.name)
                     count = coll.count()
                     metadata = collection.metadata or {}
                     collection_info.append({
@@ -375,6 +552,9 @@ class EmbeddingService:
                         'count': count,
                         'model': metadata.get('embedding_model', 'unknown')
                     })
+                except STALE_COLLECTION_ERRORS as e:
+                    logger.error(f"Error getting info for collection {collection.name}: {e}")
+                    self._collections.pop(collection.name, None)
                 except Exception as e:
                     logger.error(f"Error getting info for collection {collection.name}: {e}")
             
@@ -2,23 +2,68 @@
 Document ingestion service that orchestrates the processing pipeline.
 """
 import os
+import hashlib
 import logging
-import traceback
-from typing import Dict, List, Optional, Any, Callable
-from dataclasses import dataclass
+import multiprocessing
+from typing import Dict, List, Optional, Any, Callable, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from enum import Enum
-from datetime import datetime
+from datetime import datetime, timezone
+from pathlib import Path
 import uuid
 
-from ..parsing.pdf_content_extractor import PDFParser, ParsedDocument
-from ..parsing.paragraph_segmenter import TextSegmenter, SegmentedParagraph
+import orjson
+
+from ..parsing.paragraph_segmenter import SegmentedParagraph
 from ..parsing.document_parser import GlobalPDFParser, ParsingStrategy, GlobalParseResult
-from ...models import Document, Paragraph
+from ...models import Document, Paragraph, Embedding
 from ...repositories import DocumentRepository, ParagraphRepository
+from .embedding_queue import get_embedding_queue
 from app import db
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of paragraph rows sent in a single INSERT, keeps large
+# documents under database bind parameter limits
+PARAGRAPH_INSERT_CHUNK_SIZE = 5000
+
+
+# Parser used by ingest_documents_parallel worker processes, created once per process
+_worker_parser: Optional[GlobalPDFParser] = None
+
+
+def _init_parse_worker():
+    """Initialize a parsing worker process."""
+    global _worker_parser
+    _worker_parser = GlobalPDFParser()
+
+
+def _parse_pdf_bytes_in_worker(
+    pdf_bytes: bytes,
+    strategy: ParsingStrategy,
+    file_hash: str,
+    parse_options: Dict[str, Any]
+) -> GlobalParseResult:
+    """Parse PDF bytes in a worker process; the result is pickled back to the parent."""
+    return _worker_parser.parse_document_bytes(
+        pdf_bytes, strategy=strategy, file_hash=file_hash, **parse_options
+    )
+
+
+# Removes uploaded files of deleted documents off the request thread; worker
+# threads are only started on first use
+_file_cleanup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='file-cleanup')
+
+
+def _remove_file(file_path: str):
+    """Delete a document's physical file, ignoring files that are already gone."""
+    try:
+        Path(file_path).unlink(missing_ok=True)
+        logger.info(f"Deleted physical file: {file_path}")
+    except Exception as e:
+        logger.error(f"Error deleting physical file {file_path}: {e}")
+
 
 class IngestionStatus(Enum):
     """Status of document ingestion process."""
@@ -27,11 +72,15 @@ class IngestionStatus(Enum):
     EXTRACTING_STRUCTURE = "extracting_structure"
     SEGMENTING_TEXT = "segmenting_text"
     SAVING_TO_DATABASE = "saving_to_database"
-    GENERATING_EMBEDDINGS = "generating_embeddings"
+    EMBEDDINGS_QUEUED = "embeddings_queued"
     COMPLETED = "completed"
     FAILED = "failed"
 
 
+_STATUS_VALUES = {status: status.value for status in IngestionStatus}
+_FINISHED_STATUSES = frozenset({IngestionStatus.COMPLETED, IngestionStatus.FAILED})
+
+
 @dataclass
 class IngestionProgress:
     """Progress information for document ingestion."""
@@ -43,18 +92,26 @@ class IngestionProgress:
     error_message: Optional[str] = None
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
+    # ISO strings of the timestamps, formatted once when each is set
+    started_iso: Optional[str] = field(default=None, init=False, repr=False)
+    completed_iso: Optional[str] = field(default=None, init=False, repr=False)
+    
+    def __post_init__(self):
+        """Format the timestamps given at construction."""
+        self.started_iso = self.started_at.isoformat() if self.started_at else None
+        self.completed_iso = self.completed_at.isoformat() if self.completed_at else None
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
         return {
-            'status': self.status.value,
+            'status': _STATUS_VALUES[self.status],
             'progress_percent': self.progress_percent,
             'current_step': self.current_step,
             'total_steps': self.total_steps,
             'completed_steps': self.completed_steps,
             'error_message': self.error_message,
-            'started_at': self.started_at.isoformat() if self.started_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+            'started_at': self.started_iso,
+            'completed_at': self.completed_iso
         }
 
 
@@ -68,6 +125,7 @@ class IngestionResult:
     error_message: Optional[str] = None
     processing_time_seconds: Optional[float] = None
     progress: Optional[IngestionProgress] = None
+    embedding_job_id: Optional[str] = None
 
 
 class DocumentIngestionService:
@@ -102,9 +160,9 @@ class DocumentIngestionService:
         # Enhanced PDF parser that supports multiple strategies
         self.enhanced_parser = GlobalPDFParser()
         
-        # Legacy parsers for compatibility
-        self.pdf_parser = PDFParser()
-        self.text_segmenter = TextSegmenter()
+        # Legacy parsers for compatibility, shared with the enhanced parser
+        self.pdf_parser = self.enhanced_parser.pdf_parser
+        self.text_segmenter = self.enhanced_parser.text_segmenter
         
         self.enable_embeddings = enable_embeddings
         self.embedding_model_id = embedding_model_id
@@ -128,6 +186,8 @@ class DocumentIngestionService:
         
         # Progress tracking
         self._progress_callbacks: Dict[str, Callable[[IngestionProgress], None]] = {}
+        self._start_times: Dict[str, datetime] = {}
+        self._progress_state: Dict[str, IngestionProgress] = {}
         
         # Processing steps configuration
         self.total_steps = 4 if enable_embeddings else 3  # Enhanced parser reduces steps
@@ -149,19 +209,34 @@ class DocumentIngestionService:
         completed_steps: int,
         error_message: Optional[str] = None
     ):
-        """Update progress and notify callbacks."""
-        progress_percent = (completed_steps / self.total_steps) * 100
+        """
+        Update progress and notify callbacks.
         
-        progress = IngestionProgress(
-            status=status,
-            progress_percent=progress_percent,
-            current_step=step,
-            total_steps=self.total_steps,
-            completed_steps=completed_steps,
-            error_message=error_message,
-            started_at=getattr(self, f'_start_time_{job_id}', None),
-            completed_at=datetime.utcnow() if status in [IngestionStatus.COMPLETED, IngestionStatus.FAILED] else None
-        )
+        Each job keeps a single IngestionProgress that is updated in place, so
+        callbacks receive the same live object on every update.
+        """
+        progress = self._progress_state.get(job_id)
+        if progress is None:
+            progress = IngestionProgress(
+                status=status,
+                progress_percent=0.0,
+                current_step=step,
+                total_steps=self.total_steps,
+                completed_steps=0,
+                started_at=self._start_times.get(job_id)
+            )
+            self._progress_state[job_id] = progress
+        
+        progress.status = status
+        progress.progress_percent = (completed_steps / self.total_steps) * 100
+        progress.current_step = step
+        progress.completed_steps = completed_steps
+        progress.error_message = error_message
+        if status in _FINISHED_STATUSES:
+            progress.completed_at = datetime.now(timezone.utc)
+            progress.completed_iso = progress.completed_at.isoformat()
+        else:
+            progress.completed_at = progress.completed_iso = None
         
         # Call registered callback if exists
         if job_id in self._progress_callbacks:
@@ -176,7 +251,8 @@ class DocumentIngestionService:
         self, 
         pdf_path: str, 
         job_id: Optional[str] = None,
-        metadata_override: Optional[Dict[str, Any]] = None
+        metadata_override: Optional[Dict[str, Any]] = None,
+        embedding_model_id: Optional[str] = None
     ) -> IngestionResult:
         """
         Ingest a document from file path.
@@ -185,27 +261,41 @@ class DocumentIngestionService:
             pdf_path: Path to PDF file
             job_id: Optional job ID for progress tracking
             metadata_override: Optional metadata to override extracted metadata
+            embedding_model_id: Optional embedding model ID to use for this document
             
         Returns:
             IngestionResult with processing outcome
         """
         if not job_id:
-            job_id = str(uuid.uuid4())
+            job_id = uuid.uuid4().hex
         
         try:
+            # Hash the file in chunks and let PyMuPDF open it by path, so the
+            # PDF is never copied into a Python bytes object
             with open(pdf_path, 'rb') as f:
-                pdf_bytes = f.read()
-            return self.ingest_document_from_bytes(pdf_bytes, job_id, metadata_override)
+                file_hash = hashlib.file_digest(f, 'sha256').hexdigest()
         except Exception as e:
             logger.error(f"Error reading PDF file {pdf_path}: {e}")
             progress = self._update_progress(
                 job_id, IngestionStatus.FAILED, "Reading PDF file", 0, str(e)
             )
+            self._progress_state.pop(job_id, None)
             return IngestionResult(
                 success=False,
                 error_message=f"Error reading PDF file: {e}",
                 progress=progress
             )
+        
+        parse_options = self._get_parse_options(metadata_override)
+        return self._run_ingestion(
+            lambda: self.enhanced_parser.parse_document(
+                pdf_path, strategy=self.parsing_strategy, file_hash=file_hash, **parse_options
+            ),
+            file_hash,
+            job_id,
+            metadata_override,
+            embedding_model_id
+        )
     
     def ingest_document_from_bytes(
         self, 
@@ -223,29 +313,136 @@ class DocumentIngestionService:
             metadata_override: Optional metadata to override extracted metadata
             embedding_model_id: Optional embedding model ID to use for this document
             
+        Returns:
+            IngestionResult with processing outcome
+        """
+        file_hash = hashlib.sha256(pdf_bytes).hexdigest()
+        parse_options = self._get_parse_options(metadata_override)
+        return self._run_ingestion(
+            lambda: self.enhanced_parser.parse_document_bytes(
+                pdf_bytes, strategy=self.parsing_strategy, file_hash=file_hash, **parse_options
+            ),
+            file_hash,
+            job_id,
+            metadata_override,
+            embedding_model_id
+        )
+    
+    def ingest_documents_parallel(
+        self,
+        items: List[Tuple[bytes, Optional[Dict[str, Any]]]],
+        max_workers: Optional[int] = None,
+        embedding_model_id: Optional[str] = None
+    ) -> List[IngestionResult]:
+        """
+        Ingest several documents, parsing the PDFs in parallel worker processes.
+        
+        PyMuPDF holds the GIL while parsing, so parsing runs in a process pool.
+        Parse results are stored in the database from this process, in input order.
+        
+        Args:
+            items: List of (pdf_bytes, metadata_override) tuples
+            max_workers: Number of parsing processes (defaults to CPU count)
+            embedding_model_id: Optional embedding model ID to use for these documents
+            
+        Returns:
+            List of IngestionResult, one per input item
+        """
+        if not items:
+            return []
+        
+        max_workers = min(max_workers or os.cpu_count() or 1, len(items))
+        results = []
+        
+        # Spawned (not forked) workers don't inherit the SQLAlchemy engine or worker threads
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_parse_worker
+        ) as executor:
+            # Only parse documents that are not already stored
+            file_hashes = [hashlib.sha256(pdf_bytes).hexdigest() for pdf_bytes, _ in items]
+            futures = {}
+            for i, (pdf_bytes, metadata_override) in enumerate(items):
+                if self.document_repo.get_by_sha256(file_hashes[i]):
+                    continue
+                futures[i] = executor.submit(
+                    _parse_pdf_bytes_in_worker,
+                    pdf_bytes,
+                    self.parsing_strategy,
+                    file_hashes[i],
+                    self._get_parse_options(metadata_override)
+                )
+            
+            for i, (_, metadata_override) in enumerate(items):
+                future = futures.get(i)
+                results.append(self._run_ingestion(
+                    future.result if future else None,
+                    file_hashes[i],
+                    None,
+                    metadata_override,
+                    embedding_model_id
+                ))
+        
+        return results
+    
+    def _get_parse_options(self, metadata_override: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge toc_options with metadata_override parsing options for TOC parsing."""
+        parse_options = dict(self.toc_options)
+        if metadata_override and 'parsing_options' in metadata_override:
+            parse_options.update(metadata_override['parsing_options'])
+        return parse_options
+    
+    def _run_ingestion(
+        self,
+        parse: Optional[Callable[[], GlobalParseResult]],
+        file_hash: str,
+        job_id: Optional[str],
+        metadata_override: Optional[Dict[str, Any]],
+        embedding_model_id: Optional[str]
+    ) -> IngestionResult:
+        """
+        Run the ingestion pipeline for a single document.
+        
+        Args:
+            parse: Callable returning the parse result for the document, not called
+                when a document with the same hash already exists
+            file_hash: SHA256 hash of the PDF content
+            job_id: Optional job ID for progress tracking
+            metadata_override: Optional metadata to override extracted metadata
+            embedding_model_id: Optional embedding model ID to use for this document
+            
         Returns:
             IngestionResult with processing outcome
         """
         if not job_id:
-            job_id = str(uuid.uuid4())
+            job_id = uuid.uuid4().hex
         
-        start_time = datetime.utcnow()
-        setattr(self, f'_start_time_{job_id}', start_time)
+        start_time = datetime.now(timezone.utc)
+        self._start_times[job_id] = start_time
         
         try:
+            # Check if document already exists before doing any parsing
+            existing_doc = self.document_repo.get_by_sha256(file_hash)
+            if existing_doc:
+                logger.info(f"Document with hash {file_hash} already exists")
+                progress = self._update_progress(
+                    job_id, IngestionStatus.COMPLETED, "Document already exists", self.total_steps
+                )
+                return IngestionResult(
+                    success=True,
+                    doc_id=str(existing_doc.doc_id),
+                    document=existing_doc,
+                    paragraphs_count=self.paragraph_repo.count_by_document(str(existing_doc.doc_id)),
+                    progress=progress
+                )
+            
             # Step 1: Parse PDF with Enhanced Parser
             progress = self._update_progress(
                 job_id, IngestionStatus.PARSING_PDF, f"Parsing PDF with {self.parsing_strategy.value} strategy", 0
             )
             
-            # Merge toc_options with metadata_override for TOC parsing
-            parse_options = dict(self.toc_options)
-            if metadata_override and 'parsing_options' in metadata_override:
-                parse_options.update(metadata_override['parsing_options'])
-            
-            enhanced_result = self.enhanced_parser.parse_document_bytes(
-                pdf_bytes, strategy=self.parsing_strategy, **parse_options
-            )
+            enhanced_result = parse()
             
             if not enhanced_result or not enhanced_result.document:
                 error_msg = "Failed to parse PDF document"
@@ -266,21 +463,6 @@ class DocumentIngestionService:
                 for warning in enhanced_result.warnings:
                     logger.warning(f"Parsing warning: {warning}")
             
-            # Check if document already exists
-            existing_doc = self.document_repo.get_by_sha256(parsed_doc.file_hash)
-            if existing_doc:
-                logger.info(f"Document with hash {parsed_doc.file_hash} already exists")
-                progress = self._update_progress(
-                    job_id, IngestionStatus.COMPLETED, "Document already exists", self.total_steps
-                )
-                return IngestionResult(
-                    success=True,
-                    doc_id=str(existing_doc.doc_id),
-                    document=existing_doc,
-                    paragraphs_count=self.paragraph_repo.count_by_document(str(existing_doc.doc_id)),
-                    progress=progress
-                )
-            
             if not segmented_paragraphs:
                 error_msg = "No paragraphs were extracted from the document"
                 progress = self._update_progress(
@@ -317,28 +499,23 @@ class DocumentIngestionService:
             
             logger.info(f"Saved document {doc_id} with {len(paragraphs)} paragraphs to database")
             
-            # Step 3: Generate embeddings (optional)
+            # Step 3: Queue embedding generation (optional), runs in the background
+            embedding_job_id = None
             if self.enable_embeddings and self.embedding_service:
-                progress = self._update_progress(
-                    job_id, IngestionStatus.GENERATING_EMBEDDINGS, "Generating embeddings", 2
-                )
-                
                 try:
                     # Use provided embedding model or fall back to instance/default
                     model_to_use = embedding_model_id or self.embedding_model_id
-                    success = self.embedding_service.generate_embeddings_for_paragraphs(
-                        paragraphs, model_id=model_to_use
+                    embedding_job = get_embedding_queue().enqueue(doc_id, model_to_use)
+                    embedding_job_id = embedding_job.job_id
+                    progress = self._update_progress(
+                        job_id, IngestionStatus.EMBEDDINGS_QUEUED, "Embedding generation queued", 3
                     )
-                    if success:
-                        logger.info(f"Generated embeddings for {len(paragraphs)} paragraphs using model {model_to_use or 'default'}")
-                    else:
-                        logger.error("Failed to generate embeddings")
                 except Exception as e:
-                    logger.error(f"Error generating embeddings: {e}")
+                    logger.error(f"Error queueing embedding generation: {e}")
                     # Don't fail the entire process for embedding errors
             
             # Step 4: Complete
-            end_time = datetime.utcnow()
+            end_time = datetime.now(timezone.utc)
             processing_time = (end_time - start_time).total_seconds()
             
             progress = self._update_progress(
@@ -351,12 +528,12 @@ class DocumentIngestionService:
                 document=document,
                 paragraphs_count=len(paragraphs),
                 processing_time_seconds=processing_time,
-                progress=progress
+                progress=progress,
+                embedding_job_id=embedding_job_id
             )
             
         except Exception as e:
-            logger.error(f"Error during document ingestion: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error during document ingestion: %s", e)
             
             progress = self._update_progress(
                 job_id, IngestionStatus.FAILED, "Ingestion failed", 0, str(e)
@@ -370,6 +547,8 @@ class DocumentIngestionService:
         finally:
             # Clean up progress callback
             self.unregister_progress_callback(job_id)
+            self._start_times.pop(job_id, None)
+            self._progress_state.pop(job_id, None)
     
 
     
@@ -413,19 +592,6 @@ class DocumentIngestionService:
             if not title:
                 title = f"Document {doc_id[:8]}"
             
-            # Create document record with parsing strategy info
-            document = Document(
-                doc_id=doc_id,
-                title=title,
-                year=metadata_override.get('year') if metadata_override else None,
-                source=metadata_override.get('source') if metadata_override else None,
-                sha256=parsed_doc.file_hash,
-                lang=metadata_override.get('lang', 'en') if metadata_override else 'en'
-            )
-            
-            # Set authors using the property setter to handle JSON conversion
-            document.authors_list = authors or []
-            
             # Add parsing metadata and file info
             additional_metadata = {
                 'parsing_strategy': enhanced_result.strategy_used.value,
@@ -442,32 +608,51 @@ class DocumentIngestionService:
                 if 'file_size' in metadata_override:
                     additional_metadata['file_size'] = metadata_override['file_size']
             
-            document.additional_metadata_dict = additional_metadata
+            # Create document record with parsing strategy info. JSON columns are
+            # serialized here directly with orjson; readers json.loads them as usual.
+            document = Document(
+                doc_id=doc_id,
+                title=title,
+                authors=orjson.dumps(authors).decode() if authors else '[]',
+                year=metadata_override.get('year') if metadata_override else None,
+                source=metadata_override.get('source') if metadata_override else None,
+                sha256=parsed_doc.file_hash,
+                lang=metadata_override.get('lang', 'en') if metadata_override else 'en',
+                additional_metadata=orjson.dumps(additional_metadata).decode()
+            )
             
-            # Save document
+            # Save document (doc_id is generated client-side, so no flush is needed
+            # to reference it; the INSERT is emitted by autoflush before the paragraphs)
             db.session.add(document)
-            db.session.flush()  # Get the ID
-            
-            # Create paragraph records
-            paragraphs = []
-            for seg_para in segmented_paragraphs:
-                paragraph = Paragraph(
-                    para_id=seg_para.stable_id,
-                    doc_id=doc_id,
-                    page=seg_para.page,
-                    para_idx=seg_para.para_idx,
-                    section_path=seg_para.section_path,
-                    text=seg_para.text,
-                    type=seg_para.paragraph_type,
-                    tokens=seg_para.tokens
-                )
-                
-                # Use property setters to handle JSON serialization
-                paragraph.bbox_dict = seg_para.bbox
-                paragraph.char_span_dict = seg_para.char_span
-                
-                paragraphs.append(paragraph)
-                db.session.add(paragraph)
+            
+            # Build paragraph rows (JSON columns serialized with orjson, compact
+            # but otherwise the same JSON as the Paragraph.bbox_dict / char_span_dict setters)
+            created_at = datetime.utcnow()
+            rows = [
+                {
+                    'para_id': seg_para.stable_id,
+                    'doc_id': doc_id,
+                    'page': seg_para.page,
+                    'para_idx': seg_para.para_idx,
+                    'section_path': seg_para.section_path,
+                    'text': seg_para.text,
+                    'type': seg_para.paragraph_type,
+                    'tokens': seg_para.tokens,
+                    'bbox': orjson.dumps(seg_para.bbox).decode() if seg_para.bbox else None,
+                    'char_span': orjson.dumps(seg_para.char_span).decode() if seg_para.char_span else None,
+                    'created_at': created_at
+                }
+                for seg_para in segmented_paragraphs
+            ]
+            
+            # Bulk insert paragraphs instead of per-row ORM adds; the ORM-enabled
+            # insert autoflushes the pending document first, keeping FK order
+            paragraph_insert = db.insert(Paragraph)
+            for i in range(0, len(rows), PARAGRAPH_INSERT_CHUNK_SIZE):
+                db.session.execute(paragraph_insert, rows[i:i + PARAGRAPH_INSERT_CHUNK_SIZE])
+            
+            # Detached Paragraph objects for callers (e.g. embedding generation)
+            paragraphs = [Paragraph(**row) for row in rows]
             
             # Commit transaction
             db.session.commit()
@@ -491,29 +676,38 @@ class DocumentIngestionService:
             True if successful, False otherwise
         """
         try:
+            # Stop the document's background embedding job first, so it can't
+            # write vectors after the embeddings below are deleted
+            get_embedding_queue().cancel_document_jobs(doc_id)
+
             # Get document
             document = self.document_repo.get_by_id(doc_id)
             if not document:
                 logger.warning(f"Document {doc_id} not found for deletion")
                 return False
 
-            # Delete physical file if it exists
-            if document.file_path and os.path.exists(document.file_path):
-                try:
-                    os.remove(document.file_path)
-                    logger.info(f"Deleted physical file: {document.file_path}")
-                except Exception as e:
-                    logger.error(f"Error deleting physical file {document.file_path}: {e}")
-                    # Don't fail the entire deletion for file deletion error
+            file_path = document.file_path
 
-            # Delete embeddings if embedding service is available
-            if self.embedding_service:
-                self.embedding_service.delete_embeddings_for_document(doc_id)
+            # Bulk-delete child rows so the ORM cascade below finds nothing to
+            # load and delete row by row. The embedding service removes the
+            # embedding rows along with their vectors; without it (or if it
+            # fails) the rows are removed here.
+            if not (self.embedding_service and self.embedding_service.delete_embeddings_for_document(doc_id)):
+                para_ids = db.session.query(Paragraph.para_id).filter(Paragraph.doc_id == doc_id)
+                db.session.query(Embedding).filter(
+                    Embedding.para_id.in_(para_ids.scalar_subquery())
+                ).delete(synchronize_session=False)
+            db.session.query(Paragraph).filter(Paragraph.doc_id == doc_id).delete(synchronize_session=False)
 
-            # Delete from database (cascades to paragraphs and embeddings)
+            # Delete the document itself (also removes workspace associations)
             db.session.delete(document)
             db.session.commit()
 
+            # Remove the physical file off the request thread; a failure here
+            # doesn't fail the deletion
+            if file_path:
+                _file_cleanup_executor.submit(_remove_file, file_path)
+
             logger.info(f"Deleted document {doc_id} and all associated data")
             return True
 
@@ -0,0 +1,228 @@
+"""
+Background queue for generating document embeddings outside the ingestion request.
+"""
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Dict, Any, Optional
+
+from flask import current_app
+
+from app import db
+from ...repositories import DocumentRepository, ParagraphRepository
+
+logger = logging.getLogger(__name__)
+
+# How long deleting a document waits for its running embedding job to stop
+CANCEL_WAIT_SECONDS = 60
+
+
+class EmbeddingJobStatus(Enum):
+    """Status of a background embedding job."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class EmbeddingJob:
+    """State of a background embedding job."""
+    job_id: str
+    doc_id: str
+    model_id: Optional[str]
+    status: EmbeddingJobStatus = EmbeddingJobStatus.QUEUED
+    error_message: Optional[str] = None
+    queued_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    # Set when the document is deleted; a running job stops before its next batch
+    cancel_requested: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            'job_id': self.job_id,
+            'doc_id': self.doc_id,
+            'model_id': self.model_id,
+            'status': self.status.value,
+            'error_message': self.error_message,
+            'queued_at': self.queued_at.isoformat() if self.queued_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+
+class EmbeddingQueue:
+    """
+    In-process queue that generates embeddings for ingested documents.
+
+    Jobs run on a small thread pool inside a Flask app context, so document
+    ingestion returns once paragraphs are stored. Job state is kept in memory
+    for status polling.
+    """
+
+    def __init__(self, max_workers: int = 1, max_tracked_jobs: int = 1000):
+        """
+        Initialize the embedding queue.
+
+        Args:
+            max_workers: Number of worker threads generating embeddings
+            max_tracked_jobs: Number of most recent jobs kept for status polling
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='embedding-worker')
+        self._jobs: 'OrderedDict[str, EmbeddingJob]' = OrderedDict()
+        self._jobs_by_doc: Dict[str, str] = {}
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._max_tracked_jobs = max_tracked_jobs
+        # Shared by all jobs so its ChromaDB client and collections are reused
+        self._embedding_service = None
+
+    def enqueue(self, doc_id: str, model_id: Optional[str] = None) -> EmbeddingJob:
+        """
+        Queue embedding generation for a document's paragraphs.
+
+        Must be called inside a Flask app context.
+
+        Args:
+            doc_id: Document ID whose paragraphs should be embedded
+            model_id: Embedding model to use (defaults to system default)
+
+        Returns:
+            The queued EmbeddingJob
+        """
+        app = current_app._get_current_object()
+        job = EmbeddingJob(
+            job_id=uuid.uuid4().hex,
+            doc_id=doc_id,
+            model_id=model_id,
+            queued_at=datetime.now(timezone.utc)
+        )
+
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._jobs_by_doc[doc_id] = job.job_id
+            while len(self._jobs) > self._max_tracked_jobs:
+                _, old_job = self._jobs.popitem(last=False)
+                if self._jobs_by_doc.get(old_job.doc_id) == old_job.job_id:
+                    del self._jobs_by_doc[old_job.doc_id]
+
+        future = self._executor.submit(self._run_job, app, job)
+        with self._lock:
+            self._futures[job.job_id] = future
+        future.add_done_callback(lambda _: self._forget_future(job.job_id))
+        logger.info(f"Queued embedding job {job.job_id} for document {doc_id}")
+        return job
+
+    def get_job(self, job_id: str) -> Optional[EmbeddingJob]:
+        """Get an embedding job by ID."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get_job_for_document(self, doc_id: str) -> Optional[EmbeddingJob]:
+        """Get the most recent embedding job for a document."""
+        with self._lock:
+            job_id = self._jobs_by_doc.get(doc_id)
+            return self._jobs.get(job_id) if job_id else None
+
+    def cancel_document_jobs(self, doc_id: str):
+        """
+        Stop embedding work for a document that is being deleted.
+
+        Queued jobs are cancelled before they start. A running job stops before
+        its next batch and is waited for, so the caller can then delete every
+        embedding it wrote. Call it before the caller opens a database
+        transaction, since the job commits its last batch while the caller waits.
+
+        Args:
+            doc_id: Document ID whose jobs should be stopped
+        """
+        with self._lock:
+            pending = [
+                (job, self._futures.get(job.job_id))
+                for job in self._jobs.values()
+                if job.doc_id == doc_id
+            ]
+
+        for job, future in pending:
+            if future is None:
+                continue
+            job.cancel_requested = True
+            if future.cancel():
+                job.status = EmbeddingJobStatus.CANCELLED
+                job.completed_at = datetime.now(timezone.utc)
+                continue
+            try:
+                future.result(timeout=CANCEL_WAIT_SECONDS)
+            except FutureTimeoutError:
+                logger.warning(f"Embedding job {job.job_id} for document {doc_id} did not stop in time")
+
+    def _forget_future(self, job_id: str):
+        """Drop the future of a finished or cancelled job."""
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+    def _get_embedding_service(self):
+        """Get the queue's embedding service, creating it on first use."""
+        if self._embedding_service is None:
+            from app.services.embedding_service import EmbeddingService
+
+            with self._lock:
+                if self._embedding_service is None:
+                    self._embedding_service = EmbeddingService()
+        return self._embedding_service
+
+    def _run_job(self, app, job: EmbeddingJob):
+        """Generate embeddings for a queued job inside an app context."""
+        with app.app_context():
+            job.status = EmbeddingJobStatus.RUNNING
+            job.started_at = datetime.now(timezone.utc)
+            try:
+                if DocumentRepository().get_by_id(job.doc_id) is None:
+                    job.status = EmbeddingJobStatus.CANCELLED
+                    job.error_message = "Document no longer exists"
+                    logger.info(f"Skipping embedding job {job.job_id}, document {job.doc_id} was deleted")
+                    return
+                paragraphs = ParagraphRepository().get_by_document(job.doc_id)
+                success = self._get_embedding_service().generate_embeddings_for_paragraphs(
+                    paragraphs, model_id=job.model_id, should_stop=lambda: job.cancel_requested
+                )
+                if job.cancel_requested:
+                    job.status = EmbeddingJobStatus.CANCELLED
+                    logger.info(f"Cancelled embedding job {job.job_id} for deleted document {job.doc_id}")
+                elif success:
+                    job.status = EmbeddingJobStatus.COMPLETED
+                    logger.info(f"Generated embeddings for {len(paragraphs)} paragraphs of document {job.doc_id}")
+                else:
+                    job.status = EmbeddingJobStatus.FAILED
+                    job.error_message = "Failed to generate embeddings"
+                    logger.error(f"Failed to generate embeddings for document {job.doc_id}")
+            except Exception as e:
+                job.status = EmbeddingJobStatus.FAILED
+                job.error_message = str(e)
+                logger.error(f"Error in embedding job {job.job_id} for document {job.doc_id}: {e}")
+            finally:
+                job.completed_at = datetime.now(timezone.utc)
+                db.session.remove()
+
+
+# Global instance - created on first use
+_embedding_queue: Optional[EmbeddingQueue] = None
+_embedding_queue_lock = threading.Lock()
+
+
+def get_embedding_queue() -> EmbeddingQueue:
+    """Get the global embedding queue instance"""
+    global _embedding_queue
+    if _embedding_queue is None:
+        with _embedding_queue_lock:
+            if _embedding_queue is None:
+                _embedding_queue = EmbeddingQueue()
+    return _embedding_queue
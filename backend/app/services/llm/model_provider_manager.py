@@ -3,7 +3,8 @@ Model provider manager for handling multiple AI providers
 """
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+import time
+from typing import Dict, List, Optional, Any, Set, Tuple, Type, AsyncIterator
 from app.models.ai_models import (
     GenerationResult, EmbeddingResult, RerankingResult, 
     ModelInfo, ModelConfig, ProviderType
@@ -12,16 +13,164 @@ from app.services.llm.model_providers import ModelProvider, OpenAIProvider, Perp
 
 logger = logging.getLogger(__name__)
 
+# How long a provider's model list is trusted before it is fetched again
+MODEL_CACHE_TTL_SECONDS = 300
+
+
+def _split_usage(usage: Dict[str, int], counts: List[int]) -> List[Dict[str, int]]:
+    """Split a batch's token usage across callers in proportion to their text counts
+    
+    Integer remainders go to the last caller so the parts add up to the batch total.
+    """
+    total = sum(counts)
+    parts: List[Dict[str, int]] = [{} for _ in counts]
+    for name, value in usage.items():
+        if not isinstance(value, int) or total == 0:
+            continue
+        assigned = 0
+        for i, count in enumerate(counts[:-1]):
+            share = value * count // total
+            parts[i][name] = share
+            assigned += share
+        parts[-1][name] = value - assigned
+    return parts
+
+
+class _EmbedBatcher:
+    """
+    Coalesces concurrent embed calls for the same model into one provider request.
+    
+    A call on an idle loop/model pair is sent on the next loop iteration, so it
+    only merges with calls made in the same iteration (e.g. asyncio.gather).
+    While a request for the pair is in flight, new calls are held for a short
+    window and merged. Each caller receives an EmbeddingResult with its own
+    slice of embeddings and its share of the token usage.
+    """
+    
+    def __init__(self, window_seconds: float = 0.01, max_batch_inputs: int = 128):
+        self.window_seconds = window_seconds
+        self.max_batch_inputs = max_batch_inputs
+        self._pending: Dict[Tuple[asyncio.AbstractEventLoop, str], List[Tuple[List[str], asyncio.Future]]] = {}
+        self._pending_inputs: Dict[Tuple[asyncio.AbstractEventLoop, str], int] = {}
+        self._flush_handles: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Handle] = {}
+        # Number of batches being embedded per loop/model pair
+        self._inflight: Dict[Tuple[asyncio.AbstractEventLoop, str], int] = {}
+        # Running batch tasks; the loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+    
+    async def submit(self, provider: ModelProvider, texts: List[str], model_id: str) -> EmbeddingResult:
+        """Queue texts for embedding and wait for the batched result"""
+        loop = asyncio.get_running_loop()
+        key = (loop, model_id)
+        future = loop.create_future()
+        
+        self._pending.setdefault(key, []).append((texts, future))
+        self._pending_inputs[key] = self._pending_inputs.get(key, 0) + len(texts)
+        
+        if self._pending_inputs[key] >= self.max_batch_inputs:
+            handle = self._flush_handles.pop(key, None)
+            if handle:
+                handle.cancel()
+            self._flush(key, provider)
+        elif key not in self._flush_handles:
+            if self._inflight.get(key):
+                self._flush_handles[key] = loop.call_later(self.window_seconds, self._flush, key, provider)
+            else:
+                self._flush_handles[key] = loop.call_soon(self._flush, key, provider)
+        
+        return await future
+    
+    def _flush(self, key: Tuple[asyncio.AbstractEventLoop, str], provider: ModelProvider):
+        """Send all pending calls for a loop/model pair as one request"""
+        self._flush_handles.pop(key, None)
+        self._pending_inputs.pop(key, None)
+        batch = self._pending.pop(key, None)
+        if batch:
+            self._inflight[key] = self._inflight.get(key, 0) + 1
+            task = key[0].create_task(self._run_batch(provider, key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run_batch(
+        self,
+        provider: ModelProvider,
+        key: Tuple[asyncio.AbstractEventLoop, str],
+        batch: List[Tuple[List[str], asyncio.Future]]
+    ):
+        """Embed a merged batch and hand each caller its slice"""
+        try:
+            await self._embed_batch(provider, key[1], batch)
+        finally:
+            # Cancellation or other BaseExceptions skip _embed_batch's error
+            # handling; fail the callers instead of leaving them waiting
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("embedding batch did not complete"))
+            remaining = self._inflight.get(key, 1) - 1
+            if remaining:
+                self._inflight[key] = remaining
+            else:
+                self._inflight.pop(key, None)
+    
+    async def _embed_batch(self, provider: ModelProvider, model_id: str, batch: List[Tuple[List[str], asyncio.Future]]):
+        """Embed the texts of all calls in one request and resolve their futures"""
+        if len(batch) == 1:
+            texts, future = batch[0]
+            try:
+                result = await provider.embed(texts, model_id)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                return
+            if not future.done():
+                future.set_result(result)
+            return
+        
+        all_texts = [text for texts, _ in batch for text in texts]
+        try:
+            result = await provider.embed(all_texts, model_id)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        usages = _split_usage(result.usage, [len(texts) for texts, _ in batch])
+        offset = 0
+        for (texts, future), usage in zip(batch, usages):
+            embeddings = result.embeddings[offset:offset + len(texts)]
+            offset += len(texts)
+            if future.done():
+                continue
+            future.set_result(EmbeddingResult(
+                embeddings=embeddings,
+                model=result.model,
+                success=result.success,
+                error=result.error,
+                usage=usage,
+                metadata={**result.metadata, 'batched_requests': len(batch), 'batch_usage': dict(result.usage)}
+            ))
+
 class ModelProviderManager:
     """Manages multiple AI model providers and routes requests"""
     
+    # Provider classes by provider type (or provider name when no type is configured)
+    _PROVIDER_REGISTRY: Dict[str, Type[ModelProvider]] = {
+        'openai': OpenAIProvider,
+        'perplexity': PerplexityProvider,
+        'openrouter': OpenRouterProvider,
+    }
+    
     def __init__(self, config: Dict[str, Any]):
         """Initialize the provider manager with configuration"""
         self.config = config
         self.providers: Dict[str, ModelProvider] = {}
         self._model_to_provider: Dict[str, str] = {}
+        self._model_cache: Dict[str, Tuple[float, List[ModelInfo]]] = {}
+        self._embed_batcher = _EmbedBatcher()
         
         # Initialize providers based on configuration
+        # The model mapping is filled lazily, by get_provider_for_model and list_all_models
         self._initialize_providers()
     
     def _initialize_providers(self):
@@ -35,21 +184,16 @@ class ModelProviderManager:
                     self.providers[provider_name] = provider
                     logger.info(f"Initialized provider: {provider_name}")
                     
-                    # Build model-to-provider mapping (will be done lazily when needed)
-                    
             except Exception as e:
                 logger.error(f"Failed to initialize provider {provider_name}: {str(e)}")
     
     def _create_provider(self, name: str, config: Dict[str, Any]) -> Optional[ModelProvider]:
         """Create a provider instance based on configuration"""
         provider_type = config.get('type', '').lower()
+        provider_class = self._PROVIDER_REGISTRY.get(provider_type) or self._PROVIDER_REGISTRY.get(name.lower())
 
-        if provider_type == 'openai' or name.lower() == 'openai':
-            return OpenAIProvider(config)
-        elif provider_type == 'perplexity' or name.lower() == 'perplexity':
-            return PerplexityProvider(config)
-        elif provider_type == 'openrouter' or name.lower() == 'openrouter':
-            return OpenRouterProvider(config)
+        if provider_class:
+            return provider_class(config)
         else:
             logger.warning(f"Unknown provider type: {provider_type}")
             return None
@@ -58,17 +202,35 @@ class ModelProviderManager:
         """Update the model-to-provider mapping"""
         try:
             models = await provider.list_models()
+            self._model_cache[provider_name] = (time.monotonic(), models)
             for model in models:
                 self._model_to_provider[model.id] = provider_name
         except Exception as e:
             logger.error(f"Failed to update model mapping for {provider_name}: {str(e)}")
     
+    def _is_model_cache_stale(self, provider_name: str, ttl: float = MODEL_CACHE_TTL_SECONDS) -> bool:
+        """Check whether a provider's cached model list is missing or older than ttl"""
+        cached = self._model_cache.get(provider_name)
+        return cached is None or time.monotonic() - cached[0] > ttl
+    
+    async def _refresh_if_stale(self, ttl: float = MODEL_CACHE_TTL_SECONDS):
+        """Re-query model lists for providers whose cache is missing or expired"""
+        await asyncio.gather(*(
+            self._update_model_mapping(provider_name, provider)
+            for provider_name, provider in self.providers.items()
+            if self._is_model_cache_stale(provider_name, ttl)
+        ))
+    
     def get_provider_for_model(self, model_id: str) -> Optional[ModelProvider]:
         """Get the provider that supports a specific model"""
         provider_name = self._model_to_provider.get(model_id)
         if provider_name:
             return self.providers.get(provider_name)
         
+        # A fresh cache is authoritative, only scan providers if it may be outdated
+        if not any(self._is_model_cache_stale(name) for name in self.providers):
+            return None
+        
         # Fallback: check all providers
         for provider_name, provider in self.providers.items():
             if provider.is_model_available(model_id):
@@ -92,6 +254,21 @@ class ModelProviderManager:
         
         return await provider.generate(messages, model_id, max_completion_tokens, **kwargs)
     
+    async def generate_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model_id: str,
+        max_completion_tokens: Optional[int] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream generated text using the appropriate provider"""
+        provider = self.get_provider_for_model(model_id)
+        if not provider:
+            raise ValueError(f"No provider available for model: {model_id}")
+        
+        async for chunk in provider.generate_stream(messages, model_id, max_completion_tokens, **kwargs):
+            yield chunk
+    
     async def embed(
         self, 
         texts: List[str], 
@@ -103,7 +280,19 @@ class ModelProviderManager:
         if not provider:
             raise ValueError(f"No provider available for model: {model_id}")
         
-        return await provider.embed(texts, model_id, **kwargs)
+        # Calls with extra parameters can't be merged with other requests
+        if kwargs:
+            return await provider.embed(texts, model_id, **kwargs)
+        
+        return await self._embed_batcher.submit(provider, texts, model_id)
+    
+    async def embed_bulk(self, texts: List[str], model_id: str) -> EmbeddingResult:
+        """Generate embeddings for offline bulk indexing, through the provider's bulk API if it has one"""
+        provider = self.get_provider_for_model(model_id)
+        if not provider:
+            raise ValueError(f"No provider available for model: {model_id}")
+        
+        return await provider.embed_batch(texts, model_id)
     
     async def rerank(
         self, 
@@ -121,31 +310,32 @@ class ModelProviderManager:
     
     async def list_all_models(self) -> List[ModelInfo]:
         """List all available models from all providers"""
-        all_models = []
+        await self._refresh_if_stale()
         
-        for provider_name, provider in self.providers.items():
-            try:
-                models = await provider.list_models()
-                all_models.extend(models)
-            except Exception as e:
-                logger.error(f"Failed to list models from {provider_name}: {str(e)}")
+        all_models = []
+        for provider_name in self.providers:
+            cached = self._model_cache.get(provider_name)
+            if cached:
+                all_models.extend(cached[1])
         
         return all_models
     
     async def health_check_all(self) -> Dict[str, Dict[str, Any]]:
         """Check health of all providers"""
-        health_status = {}
+        results = await asyncio.gather(
+            *(provider.health_check() for provider in self.providers.values()),
+            return_exceptions=True
+        )
         
-        for provider_name, provider in self.providers.items():
-            try:
-                status = await provider.health_check()
-                health_status[provider_name] = status
-            except Exception as e:
-                health_status[provider_name] = {
+        health_status = {}
+        for provider_name, status in zip(self.providers.keys(), results):
+            if isinstance(status, Exception):
+                status = {
                     'status': 'error',
-                    'error': str(e),
+                    'error': str(status),
                     'provider': provider_name
                 }
+            health_status[provider_name] = status
         
         return health_status
     
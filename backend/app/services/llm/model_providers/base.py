@@ -1,17 +1,272 @@
 """
 Base model provider interface
 """
+import asyncio
+import functools
+import importlib.util
+import logging
+import random
+import ssl
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, AsyncGenerator, Awaitable, Callable
+import certifi
+import httpx
+import numpy as np
+import orjson
 from app.models.ai_models import GenerationResult, EmbeddingResult, RerankingResult, ModelInfo
 
+logger = logging.getLogger(__name__)
+
+# Connection pool limits for provider HTTP clients
+HTTP_POOL_LIMITS = httpx.Limits(max_keepalive_connections=50, max_connections=100)
+
+# Responses retried by _request_with_retry, and its exponential backoff bounds in seconds
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 30.0
+
+# TLS context shared by all HTTP clients. Building one loads the CA bundle, which
+# dominates the cost of creating a client; once built it is safe to share across
+# threads and event loops.
+SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+
+# httpx only supports HTTP/2 when the h2 package is installed
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+
+async def _run_at_loop_shutdown(callback: Callable[[], Awaitable[None]]) -> AsyncGenerator[None, None]:
+    """Async generator that awaits callback when it is finalized"""
+    try:
+        yield
+    finally:
+        await callback()
+
+
+def call_at_loop_shutdown(callback: Callable[[], Awaitable[None]]) -> AsyncGenerator[None, None]:
+    """
+    Await a callback on the running event loop when the loop shuts down
+    
+    asyncio.run() and loop.shutdown_asyncgens() finalize the loop's unfinished
+    async generators before closing it, while coroutines can still run. Loops
+    closed without shutting down their async generators skip the callback.
+    
+    Args:
+        callback: Coroutine function run at shutdown
+        
+    Returns:
+        The hook generator, which must stay referenced until the loop shuts down
+    """
+    hook = _run_at_loop_shutdown(callback)
+    # Start the generator so the loop tracks it
+    asyncio.ensure_future(hook.__anext__())
+    return hook
+
+
+def cosine_similarity_scores(query_embedding: List[float], doc_embeddings: List[List[float]]) -> List[float]:
+    """
+    Compute cosine similarity between a query embedding and each document embedding
+    
+    Args:
+        query_embedding: Embedding of the query
+        doc_embeddings: Embeddings of the documents
+        
+    Returns:
+        List of similarity scores, 0.0 where either vector has zero norm
+    """
+    if not doc_embeddings:
+        return []
+    
+    query = np.asarray(query_embedding, dtype=np.float32)
+    docs = np.asarray(doc_embeddings, dtype=np.float32)
+    
+    norms = np.linalg.norm(docs, axis=1) * np.linalg.norm(query)
+    dots = docs @ query
+    scores = np.divide(dots, norms, out=np.zeros_like(dots), where=norms != 0)
+    return scores.tolist()
+
+
 class ModelProvider(ABC):
     """Abstract base class for AI model providers"""
     
+    # Whether the provider's pooled HTTP client negotiates HTTP/2
+    USE_HTTP2 = False
+    
     def __init__(self, config: Dict[str, Any]):
         """Initialize the provider with configuration"""
         self.config = config
         self._available_models = {}
+        self._http_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        # Shutdown hooks closing each loop's clients, see call_at_loop_shutdown
+        self._loop_hooks: Dict[asyncio.AbstractEventLoop, AsyncGenerator[None, None]] = {}
+        # Guards the per-loop dicts, providers are shared by several threads
+        self._clients_lock = threading.Lock()
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """
+        Get the pooled HTTP client for the running event loop
+        
+        Async clients are bound to the loop they were created on, so one is
+        kept per loop and reused for every request made on it. A loop's clients
+        are closed when it shuts down; those of loops closed without shutting
+        down are dropped.
+        
+        Returns:
+            httpx.AsyncClient with keep-alive connection pooling
+        """
+        loop = asyncio.get_running_loop()
+        client = self._http_clients.get(loop)
+        if client is not None and not client.is_closed:
+            return client
+        
+        with self._clients_lock:
+            client = self._http_clients.get(loop)
+            if client is None or client.is_closed:
+                for stale_loop in [l for l in self._loop_hooks if l.is_closed()]:
+                    del self._loop_hooks[stale_loop]
+                    self._drop_loop_clients(stale_loop)
+                client = httpx.AsyncClient(
+                    limits=HTTP_POOL_LIMITS,
+                    verify=SSL_CONTEXT,
+                    http2=self.USE_HTTP2 and HTTP2_AVAILABLE,
+                    **self._http_client_options()
+                )
+                self._http_clients[loop] = client
+                if loop not in self._loop_hooks:
+                    self._loop_hooks[loop] = call_at_loop_shutdown(
+                        functools.partial(self._on_loop_shutdown, loop)
+                    )
+        return client
+    
+    def _drop_loop_clients(self, loop: asyncio.AbstractEventLoop) -> List[httpx.AsyncClient]:
+        """
+        Forget the clients bound to an event loop, called with _clients_lock held
+        
+        Subclasses keeping their own per-loop clients extend this.
+        
+        Returns:
+            HTTP clients that still need closing
+        """
+        client = self._http_clients.pop(loop, None)
+        return [client] if client is not None else []
+    
+    async def _close_loop_clients(self, loop: asyncio.AbstractEventLoop):
+        """Forget and close the clients bound to an event loop"""
+        with self._clients_lock:
+            clients = self._drop_loop_clients(loop)
+        for client in clients:
+            await client.aclose()
+    
+    async def _on_loop_shutdown(self, loop: asyncio.AbstractEventLoop):
+        """Close the clients of an event loop that is shutting down"""
+        with self._clients_lock:
+            self._loop_hooks.pop(loop, None)
+        await self._close_loop_clients(loop)
+    
+    def _http_client_options(self) -> Dict[str, Any]:
+        """
+        Extra options for the pooled HTTP client, such as base_url and default headers
+        
+        Returns:
+            Keyword arguments passed to httpx.AsyncClient
+        """
+        return {}
+    
+    async def _request_with_retry(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request on the pooled client, retrying transient failures
+        
+        Timeouts (including waiting for a pooled connection), connection errors,
+        429 and 5xx responses are retried up to config['max_retries'] times with
+        jittered exponential backoff, honoring Retry-After when the server sends it.
+        
+        Args:
+            method: HTTP method
+            url: URL or path on the pooled client's base_url
+            **kwargs: Arguments passed to httpx.AsyncClient.request
+            
+        Returns:
+            The last response received
+        """
+        max_retries = self.config.get('max_retries', 3)
+        client = self._get_http_client()
+        
+        for attempt in range(max_retries + 1):
+            retry_after = None
+            try:
+                response = await client.request(method, url, **kwargs)
+            except (httpx.TimeoutException, httpx.ConnectError) as e:
+                if attempt == max_retries:
+                    raise
+                reason = type(e).__name__
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt == max_retries:
+                    return response
+                reason = f"status {response.status_code}"
+                retry_after = response.headers.get('Retry-After')
+            
+            delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt + random.random())
+            if retry_after:
+                try:
+                    delay = min(RETRY_MAX_DELAY, float(retry_after))
+                except ValueError:
+                    pass
+            
+            logger.warning("Retrying %s %s after %s in %.1fs", method, url, reason, delay)
+            await asyncio.sleep(delay)
+    
+    async def _stream_chat_completion(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 300.0
+    ) -> AsyncIterator[str]:
+        """
+        Stream content deltas from an OpenAI-compatible chat completions endpoint
+        
+        Server-sent events are read as they arrive instead of buffering the
+        whole response; comment lines and events without content are skipped.
+        
+        Args:
+            path: Endpoint path on the pooled client's base_url
+            payload: Request body, 'stream' is set to True
+            headers: Extra headers for this request
+            timeout: Request timeout in seconds
+            
+        Yields:
+            Chunks of generated text
+        """
+        client = self._get_http_client()
+        async with client.stream(
+            'POST', path, content=orjson.dumps({**payload, 'stream': True}), headers=headers, timeout=timeout
+        ) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                raise RuntimeError(f"API error: {response.status_code} - {body.decode(errors='replace')}")
+            
+            async for line in response.aiter_lines():
+                if not line.startswith('data:'):
+                    continue
+                data = line[5:].strip()
+                if data == '[DONE]':
+                    break
+                
+                choices = orjson.loads(data).get('choices')
+                if choices:
+                    content = choices[0].get('delta', {}).get('content')
+                    if content:
+                        yield content
+    
+    async def close(self):
+        """Close the pooled HTTP client of the running event loop"""
+        await self._close_loop_clients(asyncio.get_running_loop())
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
     
     @abstractmethod
     async def generate(
@@ -35,6 +290,30 @@ class ModelProvider(ABC):
         """
         pass
     
+    async def generate_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model_id: str,
+        max_completion_tokens: Optional[int] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated text as it is produced
+        
+        Providers without streaming support yield the full generated text once.
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            model_id: ID of the model to use
+            max_completion_tokens: Maximum tokens to generate
+            **kwargs: Additional model-specific parameters
+            
+        Yields:
+            Chunks of generated text
+        """
+        result = await self.generate(messages, model_id, max_completion_tokens, **kwargs)
+        yield result.text
+    
     @abstractmethod
     async def embed(
         self, 
@@ -55,6 +334,22 @@ class ModelProvider(ABC):
         """
         pass
     
+    async def embed_batch(self, texts: List[str], model_id: str) -> EmbeddingResult:
+        """
+        Generate embeddings for offline bulk indexing
+        
+        Providers with a cheaper, slower bulk API override this; by default
+        the texts are embedded with regular requests.
+        
+        Args:
+            texts: List of texts to embed
+            model_id: ID of the embedding model to use
+            
+        Returns:
+            EmbeddingResult with embeddings in input order
+        """
+        return await self.embed(texts, model_id)
+    
     @abstractmethod
     async def rerank(
         self, 
@@ -1,13 +1,29 @@
 """
 OpenAI model provider implementation
 """
+import asyncio
+import concurrent.futures
+import dataclasses
+import functools
+import hashlib
+import threading
 import time
 import logging
-from typing import List, Dict, Any, Optional
-import openai
-from openai import OpenAI
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator, Callable
+import numpy as np
+import orjson
+from openai import AsyncOpenAI
 
-from .base import ModelProvider
+try:
+    import tiktoken
+except ImportError:  # token counts fall back to a character estimate
+    tiktoken = None
+
+from .base import ModelProvider, cosine_similarity_scores
+from .rate_limiter import TokenBucket
+from .semantic_cache import SemanticCache
 from app.models.ai_models import (
     GenerationResult, EmbeddingResult, RerankingResult, 
     ModelInfo, ModelType
@@ -15,11 +31,80 @@ from app.models.ai_models import (
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of embeddings kept in the per-provider LRU cache
+EMBEDDING_CACHE_SIZE = 10000
+
+# Maximum number of texts sent in one embeddings request; larger inputs are
+# split and the requests sent concurrently
+EMBEDDING_REQUEST_BATCH_SIZE = 96
+
+# Number of texts embedded by each request of a Batch API job
+BATCH_API_INPUTS_PER_REQUEST = 100
+
+# Batch API job statuses after which the job no longer changes
+BATCH_FINAL_STATUSES = frozenset({'completed', 'failed', 'expired', 'cancelled'})
+
+
+# tiktoken encodings by model id. Only successful loads are stored so a
+# transient failure (e.g. downloading the BPE file) is retried on the next call.
+_encodings: Dict[str, Any] = {}
+_encodings_lock = threading.Lock()
+
+
+def _get_encoding(model_id: str):
+    """Get the tiktoken encoding for a model, None when tiktoken is unavailable"""
+    if tiktoken is None:
+        return None
+    encoding = _encodings.get(model_id)
+    if encoding is not None:
+        return encoding
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(model_id)
+        except KeyError:
+            encoding = tiktoken.get_encoding('o200k_base')
+    except Exception as e:
+        logger.warning("Failed to load tiktoken encoding for %s: %s", model_id, e)
+        return None
+    with _encodings_lock:
+        return _encodings.setdefault(model_id, encoding)
+
+
+@functools.lru_cache(maxsize=4096)
+def _count_tokens(model_id: str, text: str) -> int:
+    """Count the tokens of a text, memoized for repeated texts such as system prompts"""
+    encoding = _get_encoding(model_id)
+    if encoding is None:
+        # About four characters per token
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _estimate_tokens(texts: List[str], model_id: str) -> int:
+    """Token count of texts for rate limiting"""
+    return sum(_count_tokens(model_id, text) for text in texts)
+
+
+def _estimate_generation_tokens(
+    messages: List[Dict[str, str]],
+    max_completion_tokens: Optional[int],
+    model_id: str
+) -> int:
+    """Token budget of a generation request: prompt plus completion limit"""
+    return _estimate_tokens([str(message.get('content', '')) for message in messages], model_id) + (max_completion_tokens or 0)
+
+
 class OpenAIProvider(ModelProvider):
     """OpenAI API provider for language models and embeddings"""
     
-    # Available OpenAI models with their specifications
-    AVAILABLE_MODELS = {
+    # Concurrent embedding chunks and generations multiplex over few connections
+    USE_HTTP2 = True
+    
+    # Generation parameters the current OpenAI client doesn't support
+    _UNSUPPORTED_KWARGS = frozenset({'reasoning_effort'})
+    
+    # Available OpenAI models with their specifications (read-only, shared by all instances)
+    AVAILABLE_MODELS = MappingProxyType({
         'gpt-5': ModelInfo(
             id='gpt-5',
             name='GPT 5',
@@ -71,7 +156,7 @@ class OpenAIProvider(ModelProvider):
             embedding_dimension=1536,
             description='Legacy embedding model (deprecated)'
         )
-    }
+    })
     
     def __init__(self, config: Dict[str, Any]):
         """Initialize OpenAI provider"""
@@ -81,15 +166,89 @@ class OpenAIProvider(ModelProvider):
         if not api_key:
             raise ValueError("OpenAI API key is required")
         
-        self.client = OpenAI(
-            api_key=api_key,
-            base_url=config.get('base_url'),
-        )
+        self.api_key = api_key
+        self.base_url = config.get('base_url')
+        # The SDK retries connection errors, 408/409/429 and 5xx responses with
+        # jittered exponential backoff, honoring Retry-After
+        self.max_retries = config.get('max_retries', 3)
+        self._clients: Dict[asyncio.AbstractEventLoop, AsyncOpenAI] = {}
+        # Unsupported parameters already warned about, each is logged once
+        self._warned_kwargs = set()
+        
+        # LRU cache of embeddings keyed by (model_id, sha256 of text). Vectors
+        # are stored as float32 arrays, the precision the API returns, instead
+        # of lists of Python floats. A thread lock is used because the provider
+        # is shared by several event loops.
+        self._embed_cache: 'OrderedDict[Tuple[str, str], np.ndarray]' = OrderedDict()
+        self._embed_cache_lock = threading.Lock()
+        # Embedding requests in flight, keyed like the cache. Thread-safe futures
+        # let callers on other event loops wait for the same request.
+        self._embed_inflight: Dict[Tuple[str, str], concurrent.futures.Future] = {}
+        
+        # Optional client-side rate limits from config['rpm'] / config['tpm']
+        rpm = config.get('rpm')
+        tpm = config.get('tpm')
+        self._request_bucket = TokenBucket(rpm, rpm / 60.0) if rpm else None
+        self._token_bucket = TokenBucket(tpm, tpm / 60.0) if tpm else None
+        
+        # Optional semantic cache of generation results, enabled by
+        # config['semantic_cache_threshold']
+        threshold = config.get('semantic_cache_threshold')
+        self._semantic_cache = SemanticCache(
+            threshold, ttl_seconds=config.get('semantic_cache_ttl', 3600)
+        ) if threshold else None
+        self._semantic_cache_model = config.get('semantic_cache_model', 'text-embedding-3-small')
+        
+        # The model list is static, so share the read-only class mapping
+        self._available_models = self.AVAILABLE_MODELS
         
-        # Store available models
-        self._available_models = self.AVAILABLE_MODELS.copy()
+        # Healthy health_check results are reused for config['health_ttl_s']
+        # seconds so frequent liveness probes don't each hit the API
+        self._health_ttl = config.get('health_ttl_s', 30)
+        self._last_health: Optional[Tuple[float, Dict[str, Any]]] = None
         
-        logger.info(f"Initialized OpenAI provider with {len(self._available_models)} models")
+        logger.info("Initialized OpenAI provider with %d models", len(self._available_models))
+    
+    def _get_client(self) -> AsyncOpenAI:
+        """Get the AsyncOpenAI client for the running event loop, sharing its pooled HTTP client"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is not None:
+            return client
+        
+        # Also registers the loop's shutdown hook, which drops this client
+        http_client = self._get_http_client()
+        with self._clients_lock:
+            client = self._clients.get(loop)
+            if client is None:
+                for stale_loop in [l for l in self._clients if l.is_closed()]:
+                    del self._clients[stale_loop]
+                client = AsyncOpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    max_retries=self.max_retries,
+                    http_client=http_client
+                )
+                self._clients[loop] = client
+        return client
+    
+    def _drop_loop_clients(self, loop: asyncio.AbstractEventLoop) -> List[Any]:
+        """Forget the loop's AsyncOpenAI client along with its HTTP client"""
+        # The AsyncOpenAI client only wraps the pooled HTTP client, closing that is enough
+        self._clients.pop(loop, None)
+        return super()._drop_loop_clients(loop)
+    
+    async def _throttle(self, estimate_tokens: Callable[[], int]):
+        """Wait for the configured request and token rate limits to admit one request
+        
+        Args:
+            estimate_tokens: Returns the token cost of the request, only called
+                when a token rate limit is configured
+        """
+        if self._request_bucket:
+            await self._request_bucket.acquire(1)
+        if self._token_bucket:
+            await self._token_bucket.acquire(estimate_tokens())
     
     async def generate(
         self, 
@@ -100,13 +259,51 @@ class OpenAIProvider(ModelProvider):
     ) -> GenerationResult:
         """Generate text using OpenAI models"""
         
-        if not self.is_model_available(model_id):
+        model_info = self._available_models.get(model_id)
+        if model_info is None:
             raise ValueError(f"Model {model_id} not available from OpenAI provider")
         
-        model_info = self.get_model_info(model_id)
-        if model_info.type != ModelType.GENERATION:
+        if model_info.type is not ModelType.GENERATION:
             raise ValueError(f"Model {model_id} is not a generation model")
         
+        # Semantic cache: only the caller-supplied query may be paraphrased. The
+        # model, limits, earlier messages and the rest of the final user message
+        # (e.g. retrieved passages) must match exactly.
+        query = kwargs.pop('semantic_cache_query', None)
+        cache_key = None
+        if self._semantic_cache and query and not kwargs and messages and messages[-1].get('role') == 'user':
+            try:
+                content = messages[-1]['content']
+                context = content[:-len(query)] if content.endswith(query) else content
+                namespace = hashlib.sha256(
+                    orjson.dumps([model_id, max_completion_tokens, messages[:-1], context], option=orjson.OPT_SORT_KEYS)
+                ).hexdigest()
+                embed_result = await self.embed([query], self._semantic_cache_model)
+                cache_key = (namespace, embed_result.embeddings[0])
+                cached = self._semantic_cache.lookup(*cache_key)
+                if cached is not None:
+                    # No tokens were spent; the original usage is kept for reference
+                    return dataclasses.replace(
+                        cached,
+                        usage={name: 0 for name in cached.usage},
+                        metadata={**cached.metadata, 'cache': 'semantic_hit', 'cached_usage': dict(cached.usage)}
+                    )
+            except Exception as e:
+                logger.warning("Semantic cache lookup failed: %s", e)
+        
+        result = await self._generate(messages, model_id, max_completion_tokens, **kwargs)
+        if cache_key:
+            self._semantic_cache.add(*cache_key, result)
+        return result
+    
+    async def _generate(
+        self,
+        messages: List[Dict[str, str]],
+        model_id: str,
+        max_completion_tokens: Optional[int] = None,
+        **kwargs
+    ) -> GenerationResult:
+        """Send a generation request to the OpenAI API"""
         try:
             # Prepare request parameters - use chat completions for standard models
             request_params = {
@@ -117,68 +314,57 @@ class OpenAIProvider(ModelProvider):
             if max_completion_tokens:
                 request_params['max_tokens'] = max_completion_tokens
             
-            # Filter out parameters that the current OpenAI client doesn't support
-            filtered_kwargs = {}
-            unsupported_params = ['reasoning_effort']  # Add other unsupported params here
-            
-            for key, value in kwargs.items():
-                if key not in unsupported_params:
-                    filtered_kwargs[key] = value
-                else:
-                    logger.warning(f"Parameter '{key}' not supported by OpenAI client, skipping")
-            
             # Add filtered additional parameters
+            filtered_kwargs = self._filter_generation_kwargs(kwargs)
             request_params.update(filtered_kwargs)
             
-            logger.debug(f"Making OpenAI generation request with model {model_id}")
+            logger.debug("Making OpenAI generation request with model %s", model_id)
+            
+            await self._throttle(functools.partial(_estimate_generation_tokens, messages, max_completion_tokens, model_id))
             
             # Check if this is a reasoning model (GPT-5 series) that needs the responses API
             if model_id.startswith('gpt-5'):
                 # Use the responses API for GPT-5 models
-                response = self.client.responses.create(
+                response = await self._get_client().responses.create(
                     model=model_id,
                     input=messages,
                     reasoning={'effort': 'high'},
                     **filtered_kwargs
                 )
 
-                # Handle new response format
-                if hasattr(response, 'output') and response.output:
-                    # Find the assistant message in the output
-                    assistant_message = None
-                    for item in response.output:
-                        if hasattr(item, 'role') and item.role == 'assistant':
-                            assistant_message = item
-                            break
-                    
-                    if assistant_message and hasattr(assistant_message, 'content'):
-                        # Extract text from content
-                        text_content = ""
-                        for content_item in assistant_message.content:
-                            if hasattr(content_item, 'text'):
-                                text_content += content_item.text
-                        
-                        return GenerationResult(
-                            text=text_content,
-                            model=model_id,
-                            usage={
-                                'prompt_tokens': response.usage.input_tokens,
-                                'completion_tokens': response.usage.output_tokens,
-                                'total_tokens': response.usage.total_tokens
-                            },
-                            metadata={
-                                'finish_reason': assistant_message.status if hasattr(assistant_message, 'status') else 'completed',
-                                'response_id': response.id,
-                                'created': response.created_at
-                            }
-                        )
-                    else:
-                        raise RuntimeError("No assistant message found in response output")
-                else:
-                    raise RuntimeError("Invalid response format from OpenAI API")
+                # Find the assistant message in the output (reasoning items
+                # come first and have no role)
+                assistant_message = next(
+                    (item for item in response.output or ()
+                     if item.type == 'message' and item.role == 'assistant'),
+                    None
+                )
+                if assistant_message is None:
+                    raise RuntimeError("No assistant message found in response output")
+                
+                # Extract text from content, skipping refusal parts
+                text_content = ''.join(
+                    content_item.text for content_item in assistant_message.content
+                    if content_item.type == 'output_text'
+                )
+                
+                return GenerationResult(
+                    text=text_content,
+                    model=model_id,
+                    usage={
+                        'prompt_tokens': response.usage.input_tokens,
+                        'completion_tokens': response.usage.output_tokens,
+                        'total_tokens': response.usage.total_tokens
+                    },
+                    metadata={
+                        'finish_reason': assistant_message.status or 'completed',
+                        'response_id': response.id,
+                        'created': response.created_at
+                    }
+                )
             else:
                 # Use standard chat completions for other models
-                response = self.client.chat.completions.create(**request_params)
+                response = await self._get_client().chat.completions.create(**request_params)
                 
                 return GenerationResult(
                     text=response.choices[0].message.content,
@@ -196,9 +382,77 @@ class OpenAIProvider(ModelProvider):
                 )
             
         except Exception as e:
-            logger.error(f"OpenAI generation error: {str(e)}")
+            logger.exception("OpenAI generation error: %s", e)
+            raise RuntimeError(f"OpenAI generation failed: {str(e)}")
+    
+    async def generate_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model_id: str,
+        max_completion_tokens: Optional[int] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream generated text from OpenAI models as it is produced"""
+        
+        model_info = self._available_models.get(model_id)
+        if model_info is None:
+            raise ValueError(f"Model {model_id} not available from OpenAI provider")
+        
+        if model_info.type is not ModelType.GENERATION:
+            raise ValueError(f"Model {model_id} is not a generation model")
+        
+        filtered_kwargs = self._filter_generation_kwargs(kwargs)
+        filtered_kwargs.pop('stream', None)
+        # Streamed responses aren't cached
+        filtered_kwargs.pop('semantic_cache_query', None)
+        
+        try:
+            logger.debug("Making OpenAI streaming generation request with model %s", model_id)
+            
+            await self._throttle(functools.partial(_estimate_generation_tokens, messages, max_completion_tokens, model_id))
+            
+            if model_id.startswith('gpt-5'):
+                # Responses API emits typed events; only text deltas are forwarded
+                stream = await self._get_client().responses.create(
+                    model=model_id,
+                    input=messages,
+                    reasoning={'effort': 'high'},
+                    stream=True,
+                    **filtered_kwargs
+                )
+                async for event in stream:
+                    if event.type == 'response.output_text.delta':
+                        yield event.delta
+            else:
+                request_params = {
+                    'model': model_id,
+                    'messages': messages,
+                    'stream': True,
+                    **filtered_kwargs
+                }
+                if max_completion_tokens:
+                    request_params['max_tokens'] = max_completion_tokens
+                
+                stream = await self._get_client().chat.completions.create(**request_params)
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            
+        except Exception as e:
+            logger.exception("OpenAI streaming generation error: %s", e)
             raise RuntimeError(f"OpenAI generation failed: {str(e)}")
     
+    def _filter_generation_kwargs(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Filter out parameters that the current OpenAI client doesn't support"""
+        filtered_kwargs = {key: value for key, value in kwargs.items() if key not in self._UNSUPPORTED_KWARGS}
+        
+        if len(filtered_kwargs) != len(kwargs):
+            for key in kwargs.keys() - filtered_kwargs.keys() - self._warned_kwargs:
+                self._warned_kwargs.add(key)
+                logger.warning("Parameter '%s' not supported by OpenAI client, skipping", key)
+        
+        return filtered_kwargs
+    
     async def embed(
         self, 
         texts: List[str], 
@@ -207,40 +461,265 @@ class OpenAIProvider(ModelProvider):
     ) -> EmbeddingResult:
         """Generate embeddings using OpenAI models"""
         
-        if not self.is_model_available(model_id):
+        model_info = self._available_models.get(model_id)
+        if model_info is None:
             raise ValueError(f"Model {model_id} not available from OpenAI provider")
         
-        model_info = self.get_model_info(model_id)
-        if model_info.type != ModelType.EMBEDDING:
+        if model_info.type is not ModelType.EMBEDDING:
             raise ValueError(f"Model {model_id} is not an embedding model")
         
         try:
-            logger.debug(f"Making OpenAI embedding request with model {model_id} for {len(texts)} texts")
+            # Request options such as dimensions change the vectors, so only
+            # plain requests go through the cache
+            if kwargs:
+                embeddings, usage, response_id = await self._create_embeddings(texts, model_id, **kwargs)
+                cached_count = 0
+            else:
+                embeddings, usage, response_id, cached_count = await self._embed_with_cache(texts, model_id)
             
-            response = self.client.embeddings.create(
+            return EmbeddingResult(
+                embeddings=embeddings,
                 model=model_id,
-                input=texts,
-                **kwargs
+                usage=usage,
+                metadata={
+                    'response_id': response_id,
+                    'embedding_dimension': len(embeddings[0]) if embeddings else 0,
+                    'cached_count': cached_count
+                }
+            )
+            
+        except Exception as e:
+            logger.exception("OpenAI embedding error: %s", e)
+            raise RuntimeError(f"OpenAI embedding failed: {str(e)}")
+    
+    async def _embed_with_cache(
+        self,
+        texts: List[str],
+        model_id: str
+    ) -> Tuple[List[List[float]], Dict[str, int], Optional[str], int]:
+        """
+        Embed texts, serving repeated texts from the embedding cache
+        
+        Texts already being embedded by another call (on any event loop) are
+        awaited instead of requested again, and duplicates within one call are
+        requested once.
+        
+        Returns:
+            Tuple of (embeddings in input order, usage of the API call,
+            response ID, number of texts not sent by this call)
+        """
+        keys = [(model_id, hashlib.sha256(text.encode('utf-8')).hexdigest()) for text in texts]
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        owned: Dict[int, concurrent.futures.Future] = {}
+        waits: List[Tuple[int, concurrent.futures.Future]] = []
+        
+        with self._embed_cache_lock:
+            for i, key in enumerate(keys):
+                embedding = self._embed_cache.get(key)
+                if embedding is not None:
+                    self._embed_cache.move_to_end(key)
+                    embeddings[i] = embedding.tolist()
+                    continue
+                
+                future = self._embed_inflight.get(key)
+                if future is None:
+                    future = concurrent.futures.Future()
+                    self._embed_inflight[key] = future
+                    owned[i] = future
+                else:
+                    waits.append((i, future))
+        
+        usage = {'prompt_tokens': 0, 'total_tokens': 0}
+        response_id = None
+        
+        if owned:
+            owned_indices = list(owned)
+            try:
+                miss_embeddings, usage, response_id = await self._create_embeddings(
+                    [texts[i] for i in owned_indices], model_id
+                )
+            except BaseException as e:
+                # Waiters on other tasks weren't cancelled themselves, so they get
+                # an ordinary error instead of this task's CancelledError
+                error = e if isinstance(e, Exception) else RuntimeError("embedding request cancelled")
+                self._fail_inflight_embeddings(keys, owned, error)
+                raise
+            
+            if len(miss_embeddings) != len(owned_indices):
+                error = RuntimeError(
+                    f"expected {len(owned_indices)} embeddings, received {len(miss_embeddings)}"
+                )
+                self._fail_inflight_embeddings(keys, owned, error)
+                raise error
+            
+            with self._embed_cache_lock:
+                for i, embedding in zip(owned_indices, miss_embeddings):
+                    embeddings[i] = embedding
+                    self._embed_cache[keys[i]] = np.asarray(embedding, dtype=np.float32)
+                    self._embed_inflight.pop(keys[i], None)
+                while len(self._embed_cache) > EMBEDDING_CACHE_SIZE:
+                    self._embed_cache.popitem(last=False)
+            
+            for i, embedding in zip(owned_indices, miss_embeddings):
+                owned[i].set_result(embedding)
+        
+        for i, future in waits:
+            embeddings[i] = await asyncio.wrap_future(future)
+        
+        return embeddings, usage, response_id, len(texts) - len(owned)
+    
+    def _fail_inflight_embeddings(
+        self,
+        keys: List[Tuple[str, str]],
+        owned: Dict[int, concurrent.futures.Future],
+        error: Exception
+    ):
+        """Stop tracking a call's in-flight texts and fail the futures other callers wait on"""
+        with self._embed_cache_lock:
+            for i in owned:
+                self._embed_inflight.pop(keys[i], None)
+        for future in owned.values():
+            if not future.done():
+                future.set_exception(error)
+    
+    async def _create_embeddings(
+        self,
+        texts: List[str],
+        model_id: str,
+        **kwargs
+    ) -> Tuple[List[List[float]], Dict[str, int], Optional[str]]:
+        """
+        Request embeddings from the OpenAI API
+        
+        Texts are split into requests of at most EMBEDDING_REQUEST_BATCH_SIZE
+        inputs which are sent concurrently.
+        
+        Returns:
+            Tuple of (embeddings, usage summed over requests, ID of the first response)
+        """
+        logger.debug("Making OpenAI embedding request with model %s for %d texts", model_id, len(texts))
+        
+        client = self._get_client()
+        
+        async def create(chunk: List[str]):
+            await self._throttle(functools.partial(_estimate_tokens, chunk, model_id))
+            return await client.embeddings.create(model=model_id, input=chunk, **kwargs)
+        
+        responses = await asyncio.gather(*(
+            create(texts[start:start + EMBEDDING_REQUEST_BATCH_SIZE])
+            for start in range(0, len(texts), EMBEDDING_REQUEST_BATCH_SIZE)
+        ))
+        
+        embeddings = [data.embedding for response in responses for data in response.data]
+        usage = {
+            'prompt_tokens': sum(response.usage.prompt_tokens for response in responses),
+            'total_tokens': sum(response.usage.total_tokens for response in responses)
+        }
+        response_id = getattr(responses[0], 'id', None) if responses else None
+        return embeddings, usage, response_id
+    
+    async def embed_batch(
+        self,
+        texts: List[str],
+        model_id: str,
+        poll_interval: float = 10.0,
+        max_poll_interval: float = 300.0
+    ) -> EmbeddingResult:
+        """
+        Generate embeddings through the OpenAI Batch API
+        
+        Batch jobs cost half as much as regular requests but complete within a
+        24 hour window, so this is meant for offline bulk indexing only.
+        
+        Args:
+            texts: List of texts to embed
+            model_id: ID of the embedding model to use
+            poll_interval: Initial delay between batch status checks in seconds
+            max_poll_interval: Upper bound for the exponential polling backoff
+            
+        Returns:
+            EmbeddingResult with embeddings in input order
+        """
+        model_info = self._available_models.get(model_id)
+        if model_info is None:
+            raise ValueError(f"Model {model_id} not available from OpenAI provider")
+        
+        if model_info.type is not ModelType.EMBEDDING:
+            raise ValueError(f"Model {model_id} is not an embedding model")
+        
+        try:
+            client = self._get_client()
+            
+            # One batch request per chunk of texts, identified by its start offset
+            lines = [
+                orjson.dumps({
+                    'custom_id': str(start),
+                    'method': 'POST',
+                    'url': '/v1/embeddings',
+                    'body': {'model': model_id, 'input': texts[start:start + BATCH_API_INPUTS_PER_REQUEST]}
+                })
+                for start in range(0, len(texts), BATCH_API_INPUTS_PER_REQUEST)
+            ]
+            input_file = await client.files.create(
+                file=('embeddings.jsonl', b'\n'.join(lines)),
+                purpose='batch'
             )
+            batch = await client.batches.create(
+                input_file_id=input_file.id,
+                endpoint='/v1/embeddings',
+                completion_window='24h'
+            )
+            logger.info("Submitted OpenAI embedding batch %s with %d requests for %d texts", batch.id, len(lines), len(texts))
+            
+            delay = poll_interval
+            while batch.status not in BATCH_FINAL_STATUSES:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, max_poll_interval)
+                batch = await client.batches.retrieve(batch.id)
             
-            embeddings = [data.embedding for data in response.data]
+            if batch.status != 'completed' or not batch.output_file_id:
+                raise RuntimeError(f"Batch {batch.id} ended with status {batch.status}")
+            
+            output = await client.files.content(batch.output_file_id)
+            
+            embeddings: List[Optional[List[float]]] = [None] * len(texts)
+            prompt_tokens = 0
+            total_tokens = 0
+            for line in output.content.splitlines():
+                if not line:
+                    continue
+                record = orjson.loads(line)
+                response = record.get('response') or {}
+                if response.get('status_code') != 200:
+                    raise RuntimeError(f"Batch request {record.get('custom_id')} failed: {record.get('error')}")
+                
+                body = response['body']
+                start = int(record['custom_id'])
+                for data in body['data']:
+                    embeddings[start + data['index']] = data['embedding']
+                prompt_tokens += body['usage'].get('prompt_tokens', 0)
+                total_tokens += body['usage'].get('total_tokens', 0)
+            
+            missing = sum(1 for embedding in embeddings if embedding is None)
+            if missing:
+                raise RuntimeError(f"Batch {batch.id} returned no embedding for {missing} texts")
             
             return EmbeddingResult(
                 embeddings=embeddings,
                 model=model_id,
                 usage={
-                    'prompt_tokens': response.usage.prompt_tokens,
-                    'total_tokens': response.usage.total_tokens
+                    'prompt_tokens': prompt_tokens,
+                    'total_tokens': total_tokens
                 },
                 metadata={
-                    'response_id': response.id if hasattr(response, 'id') else None,
+                    'batch_id': batch.id,
                     'embedding_dimension': len(embeddings[0]) if embeddings else 0
                 }
             )
             
         except Exception as e:
-            logger.error(f"OpenAI embedding error: {str(e)}")
-            raise RuntimeError(f"OpenAI embedding failed: {str(e)}")
+            logger.exception("OpenAI batch embedding error: %s", e)
+            raise RuntimeError(f"OpenAI batch embedding failed: {str(e)}")
     
     async def rerank(
         self, 
@@ -258,32 +737,23 @@ class OpenAIProvider(ModelProvider):
         # This is a fallback since OpenAI doesn't have dedicated reranking models
         
         try:
-            # Get embeddings for query and documents
-            all_texts = [query] + documents
-            embed_result = await self.embed(all_texts, model_id)
-            
-            query_embedding = embed_result.embeddings[0]
-            doc_embeddings = embed_result.embeddings[1:]
+            # Get embeddings for query and documents concurrently; the query
+            # request is small and usually served from the embedding cache
+            query_result, docs_result = await asyncio.gather(
+                self.embed([query], model_id),
+                self.embed(documents, model_id)
+            )
             
             # Compute cosine similarity scores
-            scores = []
-            for doc_embedding in doc_embeddings:
-                # Cosine similarity
-                dot_product = sum(a * b for a, b in zip(query_embedding, doc_embedding))
-                norm_query = sum(a * a for a in query_embedding) ** 0.5
-                norm_doc = sum(a * a for a in doc_embedding) ** 0.5
-                
-                if norm_query == 0 or norm_doc == 0:
-                    similarity = 0.0
-                else:
-                    similarity = dot_product / (norm_query * norm_doc)
-                
-                scores.append(similarity)
+            scores = cosine_similarity_scores(query_result.embeddings[0], docs_result.embeddings)
             
             return RerankingResult(
                 scores=scores,
                 model=model_id,
-                usage=embed_result.usage,
+                usage={
+                    key: query_result.usage.get(key, 0) + docs_result.usage.get(key, 0)
+                    for key in ('prompt_tokens', 'total_tokens')
+                },
                 metadata={
                     'method': 'embedding_similarity',
                     'note': 'Using embedding similarity as OpenAI does not have dedicated reranking models'
@@ -291,7 +761,7 @@ class OpenAIProvider(ModelProvider):
             )
             
         except Exception as e:
-            logger.error(f"OpenAI reranking error: {str(e)}")
+            logger.exception("OpenAI reranking error: %s", e)
             raise RuntimeError(f"OpenAI reranking failed: {str(e)}")
     
     async def list_models(self) -> List[ModelInfo]:
@@ -300,20 +770,27 @@ class OpenAIProvider(ModelProvider):
     
     async def health_check(self) -> Dict[str, Any]:
         """Check OpenAI API health"""
+        last_health = self._last_health
+        if last_health and time.monotonic() - last_health[0] < self._health_ttl:
+            return last_health[1]
+        
         try:
-            # Try a simple API call to check connectivity
-            models = self.client.models.list()
+            # Retrieve a single model rather than listing all of them
+            await self._get_client().models.retrieve('text-embedding-3-small')
             
-            return {
+            result = {
                 'status': 'healthy',
                 'provider': 'openai',
                 'available_models': len(self._available_models),
                 'api_accessible': True,
                 'timestamp': time.time()
             }
+            self._last_health = (time.monotonic(), result)
+            return result
             
         except Exception as e:
-            logger.error(f"OpenAI health check failed: {str(e)}")
+            self._last_health = None
+            logger.error("OpenAI health check failed: %s", e)
             return {
                 'status': 'unhealthy',
                 'provider': 'openai',
@@ -1,12 +1,25 @@
 """
 OpenRouter model provider implementation
 """
+import asyncio
+import concurrent.futures
+import dataclasses
+import hashlib
+import os
+import tempfile
+import threading
 import time
 import logging
-from typing import List, Dict, Any, Optional
+from collections import ChainMap, OrderedDict
+from pathlib import Path
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
+
 import httpx
+import numpy as np
+import orjson
 
-from .base import ModelProvider
+from .base import ModelProvider, cosine_similarity_scores
 from app.models.ai_models import (
     GenerationResult, EmbeddingResult, RerankingResult,
     ModelInfo, ModelType
@@ -14,11 +27,32 @@ from app.models.ai_models import (
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of texts sent in one embeddings request; larger inputs are
+# split and the requests sent concurrently
+EMBEDDING_REQUEST_BATCH_SIZE = 96
+
+# Maximum number of cached deterministic generation results
+GENERATION_CACHE_SIZE = 1024
+
+# Maximum number of cached embeddings
+EMBEDDING_CACHE_SIZE = 10000
+
 class OpenRouterProvider(ModelProvider):
     """OpenRouter API provider for unified access to multiple AI models"""
 
-    # Predefined models with their specifications (these will be supplemented by dynamic fetching)
-    PREDEFINED_MODELS = {
+    # Bursts of embedding and generation requests multiplex over one connection
+    USE_HTTP2 = True
+
+    # OpenAI-compatible generation parameters passed through to the API. Streaming
+    # goes through generate_stream, so 'stream' is not passed on.
+    _SUPPORTED_GENERATION_PARAMS = frozenset({
+        'temperature', 'top_p', 'top_k', 'presence_penalty',
+        'frequency_penalty', 'seed', 'stop', 'logit_bias'
+    })
+
+    # Predefined models with their specifications (these will be supplemented by dynamic fetching).
+    # Read-only so instances can't modify the class-level mapping.
+    PREDEFINED_MODELS = MappingProxyType({
         # OpenAI GPT-5 series
         'openai/gpt-5': ModelInfo(
             id='openai/gpt-5',
@@ -86,7 +120,7 @@ class OpenRouterProvider(ModelProvider):
             max_completion_tokens=1050000,
             description='Gemini 2.5 Pro is Google\'s state-of-the-art AI model designed for advanced reasoning, coding, mathematics, and scientific tasks.',
         ),
-    }
+    })
 
     def __init__(self, config: Dict[str, Any]):
         """Initialize OpenRouter provider"""
@@ -99,69 +133,204 @@ class OpenRouterProvider(ModelProvider):
         self.api_key = api_key
         self.base_url = config.get('base_url', 'https://openrouter.ai/api/v1')
 
-        # Start with predefined models, will be supplemented by dynamic fetching
-        self._available_models = self.PREDEFINED_MODELS.copy()
+        # Fetched models are added to an empty dict layered over the predefined
+        # ones, which are looked up in place instead of being copied
+        self._available_models = ChainMap({}, self.PREDEFINED_MODELS)
         self._models_fetched = False
+        # Guards _models_future, the catalog load in progress. A thread lock and
+        # a thread-safe future are used because callers run on several event loops.
+        self._models_lock = threading.Lock()
+        self._models_future: Optional[concurrent.futures.Future] = None
+
+        # LRU caches of deterministic generation results keyed by a hash of the
+        # request payload, and of embeddings keyed by (model_id, text hash).
+        # Cached vectors are float32 arrays, the precision the API returns,
+        # instead of lists of Python floats. A thread lock is used because the
+        # provider is shared by several event loops.
+        self._generate_cache: 'OrderedDict[bytes, GenerationResult]' = OrderedDict()
+        self._embed_cache: 'OrderedDict[Tuple[str, bytes], np.ndarray]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # Healthy health_check results are reused for config['health_ttl_s'] seconds
+        self._health_ttl = config.get('health_ttl_s', 30)
+        self._last_health: Optional[Tuple[float, Dict[str, Any]]] = None
+
+        # Maximum concurrent chunk requests per embed call
+        self._max_concurrent_requests = config.get('max_concurrent_requests', 10)
+
+        # Disk cache of the /models catalog shared across restarts. An empty
+        # models_cache_path disables it; disable_remote_models serves only
+        # the predefined and cached models.
+        cache_path = config.get('models_cache_path')
+        self._models_cache_path = Path(cache_path).expanduser() if cache_path else None
+        self._models_cache_ttl = config.get('models_cache_ttl', 86400)
+        self._disable_remote_models = config.get('disable_remote_models', False)
 
         logger.info("Initialized OpenRouter provider")
 
+    def _http_client_options(self) -> Dict[str, Any]:
+        """Send every request to the OpenRouter API with the auth headers set once"""
+        return {
+            'base_url': self.base_url,
+            'headers': {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            },
+            'timeout': httpx.Timeout(300.0, connect=10.0)
+        }
+
     async def _fetch_available_models(self):
-        """Fetch available models from OpenRouter API"""
+        """
+        Load the OpenRouter model catalog once
+        
+        Concurrent first calls share a single load, including callers on other
+        event loops. A failed load is retried by the next call.
+        """
         if self._models_fetched:
             return
 
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    f"{self.base_url}/models",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    }
-                )
-
-                if response.status_code != 200:
-                    logger.warning(f"Failed to fetch OpenRouter models: {response.status_code}")
-                    return
-
-                models_data = response.json()
-                models = {}
-
-                for model_data in models_data.get('data', []):
-                    model_id = model_data.get('id', '')
-                    if not model_id:
-                        continue
-
-                    # Determine model type based on capabilities
-                    model_type = ModelType.GENERATION  # Default
-                    if 'embedding' in model_id.lower() or model_data.get('description', '').lower().find('embedding') != -1:
-                        model_type = ModelType.EMBEDDING
-
-                    # Extract context length
-                    context_length = model_data.get('context_length', 4096)
-
-                    model_info = ModelInfo(
-                        id=model_id,
-                        name=model_data.get('name', model_id),
-                        provider='openrouter',
-                        type=model_type,
-                        max_completion_tokens=context_length,
-                        description=model_data.get('description', ''),
-                        embedding_dimension=model_data.get('embedding_length') if model_type == ModelType.EMBEDDING else None
-                    )
+        with self._models_lock:
+            future = self._models_future
+            owner = future is None
+            if owner:
+                future = self._models_future = concurrent.futures.Future()
 
-                    models[model_id] = model_info
+        if not owner:
+            await asyncio.wrap_future(future)
+            return
 
-                # Merge fetched models with predefined ones (don't overwrite predefined)
-                for model_id, model_info in models.items():
-                    if model_id not in self._available_models:
-                        self._available_models[model_id] = model_info
+        try:
+            await self._load_available_models()
+        finally:
+            with self._models_lock:
+                self._models_future = None
+            future.set_result(None)
 
+    async def _load_available_models(self):
+        """
+        Load the OpenRouter model catalog from the disk cache or the API
+        
+        A disk cache younger than models_cache_ttl seconds is used without a
+        request. Otherwise the catalog is fetched and the cache rewritten; when
+        the fetch fails a stale cache is served until a later call succeeds.
+        """
+        cached = self._read_models_cache()
+        if cached is not None:
+            catalog, cached_at = cached
+            if self._disable_remote_models or time.time() - cached_at < self._models_cache_ttl:
+                self._merge_models(catalog)
                 self._models_fetched = True
-                logger.info(f"Fetched {len(models)} additional models from OpenRouter (total: {len(self._available_models)})")
+                return
+
+        if self._disable_remote_models:
+            self._models_fetched = True
+            return
+
+        try:
+            response = await self._request_with_retry("GET", "/models", timeout=30.0)
+
+            if response.status_code != 200:
+                logger.warning(f"Failed to fetch OpenRouter models: {response.status_code}")
+                self._merge_stale_models(cached)
+                return
+
+            # The raw body is cached as-is instead of re-encoding the parsed catalog
+            self._write_models_cache(response.content)
+            count = self._merge_models(orjson.loads(response.content).get('data', []))
+
+            self._models_fetched = True
+            logger.info(f"Fetched {count} additional models from OpenRouter (total: {len(self._available_models)})")
 
         except Exception as e:
             logger.error(f"Failed to fetch OpenRouter models: {str(e)}")
+            self._merge_stale_models(cached)
+
+    def _merge_models(self, catalog: List[Dict[str, Any]]) -> int:
+        """
+        Add models from an OpenRouter catalog without overwriting predefined ones
+        
+        Entries are added in a single pass, and predefined models are skipped
+        before a ModelInfo is built for them.
+        
+        Args:
+            catalog: Model entries as returned in the 'data' field of /models
+            
+        Returns:
+            Number of models in the catalog
+        """
+        count = 0
+
+        for model_data in catalog:
+            model_id = model_data.get('id', '')
+            if not model_id:
+                continue
+
+            count += 1
+            # Merge fetched models with predefined ones (don't overwrite predefined)
+            if model_id in self._available_models:
+                continue
+
+            # Determine model type based on capabilities
+            model_type = ModelType.GENERATION  # Default
+            if 'embedding' in model_id.lower() or model_data.get('description', '').lower().find('embedding') != -1:
+                model_type = ModelType.EMBEDDING
+
+            # Extract context length
+            context_length = model_data.get('context_length', 4096)
+
+            model_info = ModelInfo(
+                id=model_id,
+                name=model_data.get('name', model_id),
+                provider='openrouter',
+                type=model_type,
+                max_completion_tokens=context_length,
+                description=model_data.get('description', ''),
+                embedding_dimension=model_data.get('embedding_length') if model_type == ModelType.EMBEDDING else None
+            )
+
+            self._available_models[model_id] = model_info
+
+        return count
+
+    def _merge_stale_models(self, cached: Optional[Tuple[List[Dict[str, Any]], float]]):
+        """Serve an expired catalog cache after a failed fetch"""
+        if cached is not None:
+            logger.info("Using stale OpenRouter model cache")
+            self._merge_models(cached[0])
+
+    def _read_models_cache(self) -> Optional[Tuple[List[Dict[str, Any]], float]]:
+        """
+        Read the cached model catalog
+        
+        Returns:
+            Tuple of (catalog, modification time), or None if there is no readable cache
+        """
+        if not self._models_cache_path:
+            return None
+
+        try:
+            catalog = orjson.loads(self._models_cache_path.read_bytes()).get('data', [])
+            return catalog, self._models_cache_path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Failed to read OpenRouter model cache: {str(e)}")
+            return None
+
+    def _write_models_cache(self, body: bytes):
+        """Atomically replace the cached model catalog with a raw /models response body"""
+        if not self._models_cache_path:
+            return
+
+        try:
+            self._models_cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                'wb', dir=self._models_cache_path.parent, suffix='.tmp', delete=False
+            ) as tmp:
+                tmp.write(body)
+            os.replace(tmp.name, self._models_cache_path)
+        except Exception as e:
+            logger.warning(f"Failed to write OpenRouter model cache: {str(e)}")
 
     async def generate(
         self,
@@ -172,6 +341,93 @@ class OpenRouterProvider(ModelProvider):
     ) -> GenerationResult:
         """Generate text using OpenRouter models"""
 
+        await self._check_generation_model(model_id)
+
+        try:
+            payload, headers = self._build_generation_request(messages, model_id, max_completion_tokens, kwargs)
+
+            # Deterministic requests are answered from the cache when repeated
+            cache_key = None
+            if payload.get('temperature') == 0 or payload.get('seed') is not None:
+                cache_key = hashlib.blake2b(
+                    orjson.dumps(payload, option=orjson.OPT_SORT_KEYS), digest_size=16
+                ).digest()
+                cached = self._cache_get(self._generate_cache, cache_key)
+                if cached is not None:
+                    # No tokens were spent; the original usage is kept for reference
+                    return dataclasses.replace(
+                        cached,
+                        usage={name: 0 for name in cached.usage},
+                        metadata={**cached.metadata, 'cache': 'hit', 'cached_usage': dict(cached.usage)}
+                    )
+
+            logger.debug(f"Making OpenRouter generation request with model {model_id}")
+
+            # Make direct HTTP request to OpenRouter API
+            response = await self._request_with_retry(
+                "POST",
+                "/chat/completions",
+                timeout=300.0,
+                headers=headers,
+                content=orjson.dumps(payload)
+            )
+
+            if response.status_code != 200:
+                error_msg = f"OpenRouter API error: {response.status_code} - {response.text}"
+                logger.error(error_msg)
+                raise RuntimeError(error_msg)
+
+            response_data = orjson.loads(response.content)
+
+            result = GenerationResult(
+                text=response_data['choices'][0]['message']['content'],
+                model=model_id,
+                usage={
+                    'prompt_tokens': response_data['usage'].get('prompt_tokens', 0),
+                    'completion_tokens': response_data['usage'].get('completion_tokens', 0),
+                    'total_tokens': response_data['usage'].get('total_tokens', 0)
+                },
+                metadata={
+                    'finish_reason': response_data['choices'][0]['finish_reason'],
+                    'response_id': response_data['id'],
+                    'created': response_data['created'],
+                    'model': response_data.get('model', model_id),
+                }
+            )
+
+            if cache_key is not None:
+                self._cache_put(self._generate_cache, cache_key, result, GENERATION_CACHE_SIZE)
+            return result
+
+        except Exception as e:
+            logger.error(f"OpenRouter generation error: {str(e)}")
+            raise RuntimeError(f"OpenRouter generation failed: {str(e)}")
+
+    async def generate_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model_id: str,
+        max_completion_tokens: Optional[int] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream generated text from OpenRouter models as it is produced"""
+
+        await self._check_generation_model(model_id)
+
+        try:
+            payload, headers = self._build_generation_request(messages, model_id, max_completion_tokens, kwargs)
+
+            logger.debug(f"Making OpenRouter streaming generation request with model {model_id}")
+
+            async for chunk in self._stream_chat_completion("/chat/completions", payload, headers=headers):
+                yield chunk
+
+        except Exception as e:
+            logger.error(f"OpenRouter streaming generation error: {str(e)}")
+            raise RuntimeError(f"OpenRouter streaming generation failed: {str(e)}")
+
+    async def _check_generation_model(self, model_id: str):
+        """Raise ValueError unless model_id is an available generation model"""
         await self._fetch_available_models()
 
         if not self.is_model_available(model_id):
@@ -181,76 +437,55 @@ class OpenRouterProvider(ModelProvider):
         if model_info.type != ModelType.GENERATION:
             raise ValueError(f"Model {model_id} is not a generation model")
 
-        try:
-            # Prepare request payload
-            payload = {
-                'model': model_id,
-                'messages': messages,
-            }
-
-            if max_completion_tokens:
-                payload['max_tokens'] = max_completion_tokens
-
-            # Add supported OpenAI-compatible parameters
-            supported_params = {
-                'temperature', 'top_p', 'top_k', 'presence_penalty',
-                'frequency_penalty', 'stream', 'seed', 'stop', 'logit_bias'
-            }
-
-            for key, value in kwargs.items():
-                if key in supported_params:
-                    payload[key] = value
+    def _build_generation_request(
+        self,
+        messages: List[Dict[str, str]],
+        model_id: str,
+        max_completion_tokens: Optional[int],
+        kwargs: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Optional[Dict[str, str]]]:
+        """
+        Build the chat completions payload and per-request headers
+        
+        Returns:
+            Tuple of (payload, header overrides or None)
+        """
+        # Prepare request payload
+        payload = {
+            'model': model_id,
+            'messages': messages,
+        }
 
-            # Add optional headers for app attribution
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
+        if max_completion_tokens:
+            payload['max_tokens'] = max_completion_tokens
 
-            # Add optional attribution headers
-            site_url = kwargs.get('site_url')
-            site_name = kwargs.get('site_name')
-            if site_url:
-                headers["HTTP-Referer"] = site_url
-            if site_name:
-                headers["X-Title"] = site_name
+        # Add supported OpenAI-compatible parameters
+        for key, value in kwargs.items():
+            if key in self._SUPPORTED_GENERATION_PARAMS:
+                payload[key] = value
 
-            logger.debug(f"Making OpenRouter generation request with model {model_id}")
+        return payload, self._make_headers(kwargs.get('site_url'), kwargs.get('site_name'))
 
-            # Make direct HTTP request to OpenRouter API
-            async with httpx.AsyncClient(timeout=300.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=headers,
-                    json=payload
-                )
-
-                if response.status_code != 200:
-                    error_msg = f"OpenRouter API error: {response.status_code} - {response.text}"
-                    logger.error(error_msg)
-                    raise RuntimeError(error_msg)
-
-                response_data = response.json()
-
-                return GenerationResult(
-                    text=response_data['choices'][0]['message']['content'],
-                    model=model_id,
-                    usage={
-                        'prompt_tokens': response_data['usage'].get('prompt_tokens', 0),
-                        'completion_tokens': response_data['usage'].get('completion_tokens', 0),
-                        'total_tokens': response_data['usage'].get('total_tokens', 0)
-                    },
-                    metadata={
-                        'finish_reason': response_data['choices'][0]['finish_reason'],
-                        'response_id': response_data['id'],
-                        'created': response_data['created'],
-                        'model': response_data.get('model', model_id),
-                    }
-                )
+    @staticmethod
+    def _make_headers(site_url: Optional[str], site_name: Optional[str]) -> Optional[Dict[str, str]]:
+        """
+        Build the optional app attribution headers for a request
+        
+        Auth and content type headers are client defaults, so only the
+        attribution overrides are sent per request; httpx merges them.
+        
+        Returns:
+            Header overrides, or None when no attribution is given
+        """
+        if not site_url and not site_name:
+            return None
 
-        except Exception as e:
-            logger.error(f"OpenRouter generation error: {str(e)}")
-            raise RuntimeError(f"OpenRouter generation failed: {str(e)}")
+        headers = {}
+        if site_url:
+            headers["HTTP-Referer"] = site_url
+        if site_name:
+            headers["X-Title"] = site_name
+        return headers
 
     async def embed(
         self,
@@ -270,48 +505,114 @@ class OpenRouterProvider(ModelProvider):
             raise ValueError(f"Model {model_id} is not an embedding model")
 
         try:
-            logger.debug(f"Making OpenRouter embedding request with model {model_id} for {len(texts)} texts")
-
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/embeddings",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        'model': model_id,
-                        'input': texts,
-                        **kwargs
-                    }
-                )
-
-                if response.status_code != 200:
-                    error_msg = f"OpenRouter API error: {response.status_code} - {response.text}"
-                    logger.error(error_msg)
-                    raise RuntimeError(error_msg)
-
-                response_data = response.json()
-
-                embeddings = [data['embedding'] for data in response_data['data']]
-
-                return EmbeddingResult(
-                    embeddings=embeddings,
-                    model=model_id,
-                    usage={
-                        'prompt_tokens': response_data['usage'].get('prompt_tokens', 0),
-                        'total_tokens': response_data['usage'].get('total_tokens', 0)
-                    },
-                    metadata={
-                        'response_id': response_data.get('id'),
-                        'embedding_dimension': len(embeddings[0]) if embeddings else 0
-                    }
-                )
+            # Texts embedded before are served from the cache, unless extra
+            # request parameters could change the vectors
+            embeddings: List[Optional[List[float]]] = [None] * len(texts)
+            keys = None
+            if not kwargs:
+                keys = [(model_id, hashlib.blake2b(text.encode(), digest_size=16).digest()) for text in texts]
+                with self._cache_lock:
+                    for i, key in enumerate(keys):
+                        embedding = self._embed_cache.get(key)
+                        if embedding is not None:
+                            self._embed_cache.move_to_end(key)
+                            embeddings[i] = embedding.tolist()
+
+            missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+            usage = {'prompt_tokens': 0, 'total_tokens': 0}
+            response_id = None
+
+            if missing:
+                logger.debug(f"Making OpenRouter embedding request with model {model_id} for {len(missing)} texts")
+
+                # Bounds the chunk requests of this call that are in flight at once
+                semaphore = asyncio.Semaphore(self._max_concurrent_requests)
+
+                async def embed_chunk(chunk: List[str]) -> Dict[str, Any]:
+                    async with semaphore:
+                        return await self._embed_chunk(chunk, model_id, **kwargs)
+
+                missing_texts = [texts[i] for i in missing]
+                responses = await asyncio.gather(*(
+                    embed_chunk(missing_texts[start:start + EMBEDDING_REQUEST_BATCH_SIZE])
+                    for start in range(0, len(missing_texts), EMBEDDING_REQUEST_BATCH_SIZE)
+                ))
+
+                # Decoded vectors are placed directly, without an intermediate list
+                for i, data in zip(missing, (data for r in responses for data in r['data'])):
+                    embeddings[i] = data['embedding']
+                if keys is not None:
+                    # Convert outside the lock so other loops aren't held up
+                    entries = [(keys[i], np.asarray(embeddings[i], dtype=np.float32)) for i in missing]
+                    with self._cache_lock:
+                        self._embed_cache.update(entries)
+                        for key, _ in entries:
+                            self._embed_cache.move_to_end(key)
+                        while len(self._embed_cache) > EMBEDDING_CACHE_SIZE:
+                            self._embed_cache.popitem(last=False)
+
+                usage = {
+                    'prompt_tokens': sum(r['usage'].get('prompt_tokens', 0) for r in responses),
+                    'total_tokens': sum(r['usage'].get('total_tokens', 0) for r in responses)
+                }
+                response_id = responses[0].get('id')
+
+            return EmbeddingResult(
+                embeddings=embeddings,
+                model=model_id,
+                usage=usage,
+                metadata={
+                    'response_id': response_id,
+                    'embedding_dimension': len(embeddings[0]) if embeddings else 0,
+                    'cached_count': len(texts) - len(missing)
+                }
+            )
 
         except Exception as e:
             logger.error(f"OpenRouter embedding error: {str(e)}")
             raise RuntimeError(f"OpenRouter embedding failed: {str(e)}")
 
+    def _cache_get(self, cache: OrderedDict, key):
+        """Look up an LRU cache entry, marking it most recently used"""
+        with self._cache_lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def _cache_put(self, cache: OrderedDict, key, value, max_size: int):
+        """Insert an LRU cache entry, evicting the least recently used past max_size"""
+        with self._cache_lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > max_size:
+                cache.popitem(last=False)
+
+    async def _embed_chunk(self, texts: List[str], model_id: str, **kwargs) -> Dict[str, Any]:
+        """
+        Send one embeddings request
+        
+        Returns:
+            Decoded response body
+        """
+        response = await self._request_with_retry(
+            "POST",
+            "/embeddings",
+            timeout=120.0,
+            content=orjson.dumps({
+                'model': model_id,
+                'input': texts,
+                **kwargs
+            })
+        )
+
+        if response.status_code != 200:
+            error_msg = f"OpenRouter API error: {response.status_code} - {response.text}"
+            logger.error(error_msg)
+            raise RuntimeError(error_msg)
+
+        return orjson.loads(response.content)
+
     async def rerank(
         self,
         query: str,
@@ -337,32 +638,39 @@ class OpenRouterProvider(ModelProvider):
             raise ValueError("No embedding model available for reranking")
 
         try:
-            # Get embeddings for query and documents
-            all_texts = [query] + documents
-            embed_result = await self.embed(all_texts, embedding_model)
-
-            query_embedding = embed_result.embeddings[0]
-            doc_embeddings = embed_result.embeddings[1:]
-
-            # Compute cosine similarity scores
-            scores = []
-            for doc_embedding in doc_embeddings:
-                # Cosine similarity
-                dot_product = sum(a * b for a, b in zip(query_embedding, doc_embedding))
-                norm_query = sum(a * a for a in query_embedding) ** 0.5
-                norm_doc = sum(a * a for a in doc_embedding) ** 0.5
-
-                if norm_query == 0 or norm_doc == 0:
-                    similarity = 0.0
-                else:
-                    similarity = dot_product / (norm_query * norm_doc)
-
-                scores.append(similarity)
+            # The query and each chunk of documents are embedded concurrently.
+            # A chunk is scored as soon as both its embeddings and the query's
+            # are in, while later chunks are still in flight.
+            scores: List[float] = [0.0] * len(documents)
+            usages: List[Dict[str, int]] = []
+            semaphore = asyncio.Semaphore(self._max_concurrent_requests)
+
+            async with asyncio.TaskGroup() as tg:
+                query_task = tg.create_task(self.embed([query], embedding_model))
+
+                async def score_chunk(start: int):
+                    async with semaphore:
+                        chunk_result = await self.embed(
+                            documents[start:start + EMBEDDING_REQUEST_BATCH_SIZE], embedding_model
+                        )
+                    query_embedding = (await query_task).embeddings[0]
+                    chunk_scores = cosine_similarity_scores(query_embedding, chunk_result.embeddings)
+                    scores[start:start + len(chunk_scores)] = chunk_scores
+                    usages.append(chunk_result.usage)
+
+                for start in range(0, len(documents), EMBEDDING_REQUEST_BATCH_SIZE):
+                    tg.create_task(score_chunk(start))
+
+            usages.append(query_task.result().usage)
+            usage = {
+                'prompt_tokens': sum(u.get('prompt_tokens', 0) for u in usages),
+                'total_tokens': sum(u.get('total_tokens', 0) for u in usages)
+            }
 
             return RerankingResult(
                 scores=scores,
                 model=model_id,
-                usage=embed_result.usage,
+                usage=usage,
                 metadata={
                     'method': 'embedding_similarity',
                     'embedding_model': embedding_model,
@@ -371,6 +679,9 @@ class OpenRouterProvider(ModelProvider):
             )
 
         except Exception as e:
+            # Report the first failure rather than the TaskGroup wrapper
+            if isinstance(e, ExceptionGroup):
+                e = e.exceptions[0]
             logger.error(f"OpenRouter reranking error: {str(e)}")
             raise RuntimeError(f"OpenRouter reranking failed: {str(e)}")
 
@@ -381,26 +692,27 @@ class OpenRouterProvider(ModelProvider):
 
     async def health_check(self) -> Dict[str, Any]:
         """Check OpenRouter API health"""
+        last_health = self._last_health
+        if last_health and time.monotonic() - last_health[0] < self._health_ttl:
+            return last_health[1]
+
         try:
-            # Try a simple API call to check connectivity
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    f"{self.base_url}/models",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    }
-                )
+            # The API key endpoint checks connectivity and auth with a small
+            # response; the model count comes from the cached catalog
+            client = self._get_http_client()
+            response = await client.get("/key", timeout=30.0)
 
             if response.status_code == 200:
-                models_data = response.json()
-                return {
+                await self._fetch_available_models()
+                result = {
                     'status': 'healthy',
                     'provider': 'openrouter',
-                    'available_models': len(models_data.get('data', [])),
+                    'available_models': len(self._available_models),
                     'api_accessible': True,
                     'timestamp': time.time()
                 }
+                self._last_health = (time.monotonic(), result)
+                return result
             else:
                 return {
                     'status': 'unhealthy',
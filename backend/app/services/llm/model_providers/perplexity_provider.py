@@ -1,10 +1,14 @@
 """
 Perplexity model provider implementation
 """
+import re
 import time
 import logging
-from typing import List, Dict, Any, Optional
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
+
 import httpx
+import orjson
 
 from .base import ModelProvider
 from app.models.ai_models import (
@@ -14,11 +18,17 @@ from app.models.ai_models import (
 
 logger = logging.getLogger(__name__)
 
+# Citation markers like [1] in Perplexity answers
+CITATION_PATTERN = re.compile(r'\[(\d+)\]')
+
 class PerplexityProvider(ModelProvider):
     """Perplexity API provider for language models with web search capabilities"""
 
-    # Available Perplexity models with their specifications
-    AVAILABLE_MODELS = {
+    # Concurrent generations multiplex over one connection
+    USE_HTTP2 = True
+
+    # Available Perplexity models with their specifications (read-only, shared by instances)
+    AVAILABLE_MODELS = MappingProxyType({
         'sonar': ModelInfo(
             id='sonar',
             name='Sonar',
@@ -59,7 +69,7 @@ class PerplexityProvider(ModelProvider):
             max_completion_tokens=500000,
             description='Perplexity Sonar Deep Research - Deep analysis and research'
         )
-    }
+    })
 
     def __init__(self, config: Dict[str, Any]):
         """Initialize Perplexity provider"""
@@ -70,12 +80,29 @@ class PerplexityProvider(ModelProvider):
             raise ValueError("Perplexity API key is required")
 
         self.api_key = api_key
+        self.base_url = config.get('base_url', 'https://api.perplexity.ai')
+
+        # The model list is static, so share the read-only class mapping
+        self._available_models = self.AVAILABLE_MODELS
 
-        # Store available models
-        self._available_models = self.AVAILABLE_MODELS.copy()
+        # Healthy health_check results are reused for config['health_ttl_s']
+        # seconds, since each probe spends tokens
+        self._health_ttl = config.get('health_ttl_s', 300)
+        self._last_health: Optional[Tuple[float, Dict[str, Any]]] = None
 
         logger.info(f"Initialized Perplexity provider with {len(self._available_models)} models")
 
+    def _http_client_options(self) -> Dict[str, Any]:
+        """Send every request to the Perplexity API with the auth headers set once"""
+        return {
+            'base_url': self.base_url,
+            'headers': {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            },
+            'timeout': httpx.Timeout(300.0, connect=10.0)
+        }
+
     async def generate(
         self,
         messages: List[Dict[str, str]],
@@ -85,143 +112,186 @@ class PerplexityProvider(ModelProvider):
     ) -> GenerationResult:
         """Generate text using Perplexity models with optional custom domains"""
 
-        if not self.is_model_available(model_id):
-            raise ValueError(f"Model {model_id} not available from Perplexity provider")
-
-        model_info = self.get_model_info(model_id)
-        if model_info.type != ModelType.GENERATION:
-            raise ValueError(f"Model {model_id} is not a generation model")
+        self._check_generation_model(model_id)
 
         try:
-            # Prepare request payload
-            payload = {
-                'model': model_id,
-                'messages': messages,
-            }
-
-            if max_completion_tokens:
-                payload['max_tokens'] = max_completion_tokens
-
-            # Handle Perplexity-specific parameters
-            # Extract custom domains from kwargs
-            custom_domains = kwargs.pop('custom_domains', None)
-            if custom_domains:
-                if isinstance(custom_domains, list):
-                    payload['search_domain_filter'] = custom_domains
-                else:
-                    payload['search_domain_filter'] = [custom_domains]
-                logger.info(f"Using custom domains for search: {payload['search_domain_filter']}")
-
-            # Extract other Perplexity-specific parameters
-            search_recency_filter = kwargs.pop('search_recency_filter', None)
-            if search_recency_filter:
-                payload['search_recency_filter'] = search_recency_filter
-
-            return_sources = kwargs.pop('return_sources', True)
-            payload['return_sources'] = return_sources
-
-            return_related_questions = kwargs.pop('return_related_questions', False)
-            payload['return_related_questions'] = return_related_questions
-
-            # Add supported OpenAI-compatible parameters
-            supported_params = {
-                'temperature', 'top_p', 'top_k', 'presence_penalty',
-                'frequency_penalty', 'stream', 'seed'
-            }
-
-            for key, value in kwargs.items():
-                if key in supported_params:
-                    payload[key] = value
+            payload = self._build_generation_payload(messages, model_id, max_completion_tokens, kwargs)
 
             logger.debug(f"Making Perplexity API request with model {model_id}")
 
             # Make direct HTTP request to Perplexity API
-            async with httpx.AsyncClient(timeout=300.0) as client:
-                response = await client.post(
-                    "https://api.perplexity.ai/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json=payload
+            response = await self._request_with_retry(
+                "POST",
+                "/chat/completions",
+                timeout=300.0,
+                content=orjson.dumps(payload)
+            )
+
+            if response.status_code != 200:
+                error_msg = f"Perplexity API error: {response.status_code} - {response.text}"
+                logger.error(error_msg)
+                raise RuntimeError(error_msg)
+
+            response_data = orjson.loads(response.content)
+
+            # Extract the response content
+            content = response_data['choices'][0]['message']['content']
+
+            # Extract citations and search results if available
+            citations = []
+            search_results = []
+            formatted_citations = []
+
+            if 'citations' in response_data:
+                citations = response_data['citations']
+
+            if 'search_results' in response_data:
+                search_results = response_data['search_results']
+
+                # Create formatted citations for replacement
+                for i, result in enumerate(search_results, 1):
+                    formatted_citations.append({
+                        'index': i,
+                        'title': result.get('title', 'Unknown Title'),
+                        'url': result.get('url', ''),
+                        'date': result.get('date', ''),
+                        'snippet': result.get('snippet', ''),
+                        'last_updated': result.get('last_updated', '')
+                    })
+
+            # Replace [1][2] etc. with clickable links in a single pass, skipped
+            # when the answer has no markers
+            if formatted_citations and CITATION_PATTERN.search(content):
+                replacements = {}
+                for citation in formatted_citations:
+                    title = citation['title'][:50] + "..." if len(citation['title']) > 50 else citation['title']
+                    replacements[str(citation['index'])] = f"[\\[{citation['index']}\\]]({citation['url']} \"{title}\")"
+                content = CITATION_PATTERN.sub(
+                    lambda match: replacements.get(match.group(1), match.group(0)), content
                 )
 
-                if response.status_code != 200:
-                    error_msg = f"Perplexity API error: {response.status_code} - {response.text}"
-                    logger.error(error_msg)
-                    raise RuntimeError(error_msg)
-
-                response_data = response.json()
-
-                # Extract the response content
-                content = response_data['choices'][0]['message']['content']
-
-                # Extract citations and search results if available
-                citations = []
-                search_results = []
-                formatted_citations = []
-
-                if 'citations' in response_data:
-                    citations = response_data['citations']
-
-                if 'search_results' in response_data:
-                    search_results = response_data['search_results']
-
-                    # Create formatted citations for replacement
-                    for i, result in enumerate(search_results, 1):
-                        formatted_citations.append({
-                            'index': i,
-                            'title': result.get('title', 'Unknown Title'),
-                            'url': result.get('url', ''),
-                            'date': result.get('date', ''),
-                            'snippet': result.get('snippet', ''),
-                            'last_updated': result.get('last_updated', '')
-                        })
-
-                # Replace [1][2] etc. with actual citations in the content
-                if formatted_citations:
-                    import re
-                    for citation in formatted_citations:
-                        # Replace patterns like [1], [2], etc. with clickable links
-                        pattern = r'\[(' + str(citation['index']) + r')\]'
-                        title = citation['title'][:50] + "..." if len(citation['title']) > 50 else citation['title']
-                        replacement = f"[\\[{citation['index']}\\]]({citation['url']} \"{title}\")"
-                        content = re.sub(pattern, replacement, content)
-
-                # Prepare metadata
-                metadata = {
-                    'finish_reason': response_data['choices'][0]['finish_reason'],
-                    'response_id': response_data['id'],
-                    'created': response_data['created'],
-                    'model': response_data['model'],
-                    'citations': citations,
-                    'search_results': search_results,
-                    'formatted_citations': formatted_citations
-                }
+            # Prepare metadata
+            metadata = {
+                'finish_reason': response_data['choices'][0]['finish_reason'],
+                'response_id': response_data['id'],
+                'created': response_data['created'],
+                'model': response_data['model'],
+                'citations': citations,
+                'search_results': search_results,
+                'formatted_citations': formatted_citations
+            }
 
-                # Add Perplexity-specific metadata from usage
-                if 'usage' in response_data:
-                    usage = response_data['usage']
-                    if 'citations' in usage:
-                        metadata['citations_count'] = len(usage['citations']) if usage['citations'] else 0
-                    if 'search_queries' in usage:
-                        metadata['search_queries'] = usage['search_queries']
-
-                return GenerationResult(
-                    text=content,
-                    model=model_id,
-                    usage={
-                        'prompt_tokens': response_data['usage'].get('prompt_tokens', 0),
-                        'completion_tokens': response_data['usage'].get('completion_tokens', 0),
-                        'total_tokens': response_data['usage'].get('total_tokens', 0)
-                    },
-                    metadata=metadata
-                )
+            # Add Perplexity-specific metadata from usage
+            if 'usage' in response_data:
+                usage = response_data['usage']
+                if 'citations' in usage:
+                    metadata['citations_count'] = len(usage['citations']) if usage['citations'] else 0
+                if 'search_queries' in usage:
+                    metadata['search_queries'] = usage['search_queries']
+
+            return GenerationResult(
+                text=content,
+                model=model_id,
+                usage={
+                    'prompt_tokens': response_data['usage'].get('prompt_tokens', 0),
+                    'completion_tokens': response_data['usage'].get('completion_tokens', 0),
+                    'total_tokens': response_data['usage'].get('total_tokens', 0)
+                },
+                metadata=metadata
+            )
 
         except Exception as e:
             logger.error(f"Perplexity generation error: {str(e)}")
             raise RuntimeError(f"Perplexity generation failed: {str(e)}")
 
+    async def generate_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model_id: str,
+        max_completion_tokens: Optional[int] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated text from Perplexity models as it is produced
+        
+        Citation markers are streamed as-is since search results only arrive
+        with the final response.
+        """
+
+        self._check_generation_model(model_id)
+
+        try:
+            payload = self._build_generation_payload(messages, model_id, max_completion_tokens, kwargs)
+
+            logger.debug(f"Making Perplexity streaming API request with model {model_id}")
+
+            async for chunk in self._stream_chat_completion("/chat/completions", payload):
+                yield chunk
+
+        except Exception as e:
+            logger.error(f"Perplexity streaming generation error: {str(e)}")
+            raise RuntimeError(f"Perplexity streaming generation failed: {str(e)}")
+
+    def _check_generation_model(self, model_id: str):
+        """Raise ValueError unless model_id is an available generation model"""
+        if not self.is_model_available(model_id):
+            raise ValueError(f"Model {model_id} not available from Perplexity provider")
+
+        model_info = self.get_model_info(model_id)
+        if model_info.type != ModelType.GENERATION:
+            raise ValueError(f"Model {model_id} is not a generation model")
+
+    def _build_generation_payload(
+        self,
+        messages: List[Dict[str, str]],
+        model_id: str,
+        max_completion_tokens: Optional[int],
+        kwargs: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Build the chat completions payload, mapping Perplexity search options"""
+        # Prepare request payload
+        payload = {
+            'model': model_id,
+            'messages': messages,
+        }
+
+        if max_completion_tokens:
+            payload['max_tokens'] = max_completion_tokens
+
+        # Handle Perplexity-specific parameters
+        # Extract custom domains from kwargs
+        custom_domains = kwargs.pop('custom_domains', None)
+        if custom_domains:
+            if isinstance(custom_domains, list):
+                payload['search_domain_filter'] = custom_domains
+            else:
+                payload['search_domain_filter'] = [custom_domains]
+            logger.info(f"Using custom domains for search: {payload['search_domain_filter']}")
+
+        # Extract other Perplexity-specific parameters
+        search_recency_filter = kwargs.pop('search_recency_filter', None)
+        if search_recency_filter:
+            payload['search_recency_filter'] = search_recency_filter
+
+        return_sources = kwargs.pop('return_sources', True)
+        payload['return_sources'] = return_sources
+
+        return_related_questions = kwargs.pop('return_related_questions', False)
+        payload['return_related_questions'] = return_related_questions
+
+        # Add supported OpenAI-compatible parameters. Streaming goes through
+        # generate_stream, so 'stream' is not passed on.
+        supported_params = {
+            'temperature', 'top_p', 'top_k', 'presence_penalty',
+            'frequency_penalty', 'seed'
+        }
+
+        for key, value in kwargs.items():
+            if key in supported_params:
+                payload[key] = value
+
+        return payload
+
     async def embed(
         self,
         texts: List[str],
@@ -263,30 +333,34 @@ class PerplexityProvider(ModelProvider):
 
     async def health_check(self) -> Dict[str, Any]:
         """Check Perplexity API health"""
+        last_health = self._last_health
+        if last_health and time.monotonic() - last_health[0] < self._health_ttl:
+            return last_health[1]
+
         try:
-            # Try a simple API call to check connectivity
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    "https://api.perplexity.ai/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": "sonar",
-                        "messages": [{"role": "user", "content": "Hello"}],
-                        "max_tokens": 1
-                    }
-                )
+            # Perplexity has no lightweight endpoint, so a one-token completion
+            # checks connectivity
+            client = self._get_http_client()
+            response = await client.post(
+                "/chat/completions",
+                timeout=30.0,
+                content=orjson.dumps({
+                    "model": "sonar",
+                    "messages": [{"role": "user", "content": "Hello"}],
+                    "max_tokens": 1
+                })
+            )
 
             if response.status_code == 200:
-                return {
+                result = {
                     'status': 'healthy',
                     'provider': 'perplexity',
                     'available_models': len(self._available_models),
                     'api_accessible': True,
                     'timestamp': time.time()
                 }
+                self._last_health = (time.monotonic(), result)
+                return result
             else:
                 return {
                     'status': 'unhealthy',
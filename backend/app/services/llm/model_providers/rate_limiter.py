@@ -0,0 +1,52 @@
+"""
+Client-side rate limiting for model providers
+"""
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter shared by all event loops using a provider
+    
+    Callers reserve tokens up front and sleep until the bucket has refilled
+    enough to cover them, so bursts are spread out at the refill rate instead
+    of running into the API's rate limits.
+    """
+    
+    def __init__(self, capacity: float, refill_per_second: float):
+        """
+        Initialize the bucket full.
+        
+        Args:
+            capacity: Maximum number of tokens the bucket holds
+            refill_per_second: Tokens added per second
+        """
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _reserve(self, amount: float) -> float:
+        """Take tokens from the bucket and return how long to wait before using them"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated_at) * self.refill_per_second
+            )
+            self._updated_at = now
+            
+            # A single request larger than the bucket only waits for a full bucket
+            self._tokens -= min(amount, self.capacity)
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.refill_per_second
+    
+    async def acquire(self, amount: float = 1.0):
+        """Wait until the given number of tokens is available"""
+        delay = self._reserve(amount)
+        if delay > 0:
+            await asyncio.sleep(delay)
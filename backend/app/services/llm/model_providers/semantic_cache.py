@@ -0,0 +1,118 @@
+"""
+Similarity-based cache for generation results
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+
+def _quantize_int8(vector: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Scale a vector into int8 range, returning the int8 vector and its scale"""
+    scale = float(np.max(np.abs(vector))) / 127.0
+    if not scale:
+        return np.zeros(vector.shape, dtype=np.int8), 1.0
+    return np.round(vector / scale).astype(np.int8), scale
+
+
+class SemanticCache:
+    """
+    Cache that returns a stored value for queries whose embedding is close
+    enough to a previously seen query.
+    
+    Entries are grouped by namespace; a lookup only considers entries of the
+    same namespace, so callers put everything that must match exactly (model,
+    system prompt, conversation history) into the namespace and only the
+    paraphrasable part into the embedding. Query vectors are stored as int8
+    with a per-vector scale, a quarter of the float32 size, and dequantized
+    only when scoring.
+    """
+    
+    def __init__(
+        self,
+        threshold: float,
+        ttl_seconds: float = 3600.0,
+        max_namespaces: int = 1000,
+        max_entries_per_namespace: int = 100
+    ):
+        """
+        Initialize the cache.
+        
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            ttl_seconds: How long entries are served
+            max_namespaces: Number of most recently used namespaces kept
+            max_entries_per_namespace: Number of newest entries kept per namespace
+        """
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_namespaces = max_namespaces
+        self.max_entries_per_namespace = max_entries_per_namespace
+        self._entries: 'OrderedDict[str, List[Tuple[float, np.ndarray, float, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _normalize(embedding: List[float]) -> Optional[np.ndarray]:
+        """Convert an embedding to a unit float32 vector, None for zero vectors"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+    
+    def lookup(self, namespace: str, embedding: List[float]) -> Optional[Any]:
+        """
+        Find the cached value of the most similar query in a namespace
+        
+        Args:
+            namespace: Exact-match part of the cache key
+            embedding: Embedding of the query
+            
+        Returns:
+            The cached value if a live entry reaches the threshold, None otherwise
+        """
+        query = self._normalize(embedding)
+        if query is None:
+            return None
+        
+        with self._lock:
+            entries = self._entries.get(namespace)
+            if not entries:
+                return None
+            
+            cutoff = time.monotonic() - self.ttl_seconds
+            entries[:] = [entry for entry in entries if entry[0] >= cutoff]
+            if not entries:
+                del self._entries[namespace]
+                return None
+            
+            self._entries.move_to_end(namespace)
+            vectors = np.stack([vector for _, vector, _, _ in entries]).astype(np.float32)
+            scales = np.array([scale for _, _, scale, _ in entries], dtype=np.float32)
+            scores = (vectors @ query) * scales
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                return entries[best][3]
+            return None
+    
+    def add(self, namespace: str, embedding: List[float], value: Any):
+        """
+        Store a value for a query
+        
+        Args:
+            namespace: Exact-match part of the cache key
+            embedding: Embedding of the query
+            value: Value returned for similar queries
+        """
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+        
+        with self._lock:
+            entries = self._entries.setdefault(namespace, [])
+            self._entries.move_to_end(namespace)
+            quantized, scale = _quantize_int8(vector)
+            entries.append((time.monotonic(), quantized, scale, value))
+            del entries[:-self.max_entries_per_namespace]
+            while len(self._entries) > self.max_namespaces:
+                self._entries.popitem(last=False)
@@ -3,38 +3,71 @@ Multi-strategy PDF parsing service that supports multiple parsing approaches:
 1. TOC-based parsing with smart section detection and missing section discovery
 2. Standard PDF parsing as fallback
 """
+import hashlib
+import json
 import logging
-from typing import Dict, List, Optional, Any, Union
-from dataclasses import dataclass
+import mmap
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Union, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
 
-from .pdf_content_extractor import PDFParser, ParsedDocument
-from .structure_parser import TOCParser, TOCParseResult
-from .paragraph_segmenter import TextSegmenter, SegmentedParagraph
+import fitz  # PyMuPDF
+
+from .pdf_content_extractor import ParsedDocument, get_pdf_parser
+from .structure_parser import TOCParseResult, get_toc_parser
+from .paragraph_segmenter import TextSegmenter, SegmentedParagraph, CHARS_PER_TOKEN, estimate_token_count
 
 logger = logging.getLogger(__name__)
 
+# Number of parse results each GlobalPDFParser keeps, keyed by content hash,
+# strategy and options
+PARSE_CACHE_SIZE = 32
+
+# Total size of the pickled parse results each GlobalPDFParser keeps
+PARSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Number of (path, mtime, size) -> content hash entries kept to skip rehashing
+# unchanged files
+PATH_HASH_CACHE_SIZE = 256
+
+# TOC paragraphs shorter than this (after stripping) are dropped as artifacts
+# such as page numbers and running headers
+MIN_TOC_PARAGRAPH_CHARS = 10
 
-class ParsingStrategy(Enum):
-    """Available parsing strategies."""
+# Pages of text blocks extracted for the ParsedDocument on the TOC path. TOC
+# paragraphs come from the TOC parser, so the blocks only feed the first-page
+# title fallback.
+TOC_TEXT_BLOCK_PAGES = 1
+
+
+class ParsingStrategy(str, Enum):
+    """Available parsing strategies (members compare equal to their string values)."""
     AUTO = "auto"           # Automatic strategy selection
     TOC = "toc"             # TOC-based parsing
     STANDARD = "standard"   # Standard PDF parsing
 
 
-@dataclass
+# Strategy preferences and fallback chain, shared by all parser instances
+STRATEGY_FALLBACK: Dict[ParsingStrategy, Tuple[ParsingStrategy, ...]] = {
+    ParsingStrategy.AUTO: (ParsingStrategy.TOC, ParsingStrategy.STANDARD),
+    ParsingStrategy.TOC: (ParsingStrategy.TOC, ParsingStrategy.STANDARD),
+    ParsingStrategy.STANDARD: (ParsingStrategy.STANDARD,)
+}
+
+
+@dataclass(slots=True)
 class GlobalParseResult:
     """Result of multi-strategy PDF parsing with multiple approach support."""
     strategy_used: ParsingStrategy
     document: ParsedDocument
     paragraphs: List[SegmentedParagraph]
     toc_result: Optional[TOCParseResult] = None
-    warnings: List[str] = None
-    
-    def __post_init__(self):
-        if self.warnings is None:
-            self.warnings = []
+    warnings: List[str] = field(default_factory=list)
 
 
 class GlobalPDFParser:
@@ -50,21 +83,26 @@ class GlobalPDFParser:
         """
         Initialize the multi-strategy PDF parser.
         """
-        self.pdf_parser = PDFParser()
-        self.toc_parser = TOCParser()
+        # The PDF and TOC parsers are stateless and shared process-wide.
+        # TextSegmenter keeps per-document layout stats, so each parser owns one.
+        self.pdf_parser = get_pdf_parser()
+        self.toc_parser = get_toc_parser()
         self.text_segmenter = TextSegmenter()
         
-        # Strategy preferences and fallback chain
-        self.strategy_fallback = {
-            ParsingStrategy.AUTO: [ParsingStrategy.TOC, ParsingStrategy.STANDARD],
-            ParsingStrategy.TOC: [ParsingStrategy.TOC, ParsingStrategy.STANDARD],
-            ParsingStrategy.STANDARD: [ParsingStrategy.STANDARD]
-        }
+        # Content-addressed LRU of pickled parse results. Results are stored
+        # pickled so callers can't modify cached paragraphs.
+        self._parse_cache: 'OrderedDict[Tuple[str, str, str], bytes]' = OrderedDict()
+        self._parse_cache_bytes = 0
+        self._path_hashes: 'OrderedDict[Tuple[str, int, int], str]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
     
     def parse_document(
         self, 
         pdf_path: str, 
         strategy: ParsingStrategy = ParsingStrategy.AUTO,
+        file_hash: Optional[str] = None,
         **options
     ) -> GlobalParseResult:
         """
@@ -73,17 +111,21 @@ class GlobalPDFParser:
         Args:
             pdf_path: Path to PDF file
             strategy: Parsing strategy to use
+            file_hash: Precomputed SHA256 hash of the file (computed if not given).
+                Callers passing it, such as ingestion, which skips stored hashes
+                itself, bypass the parse cache.
             **options: Additional parsing options
         
         Returns:
             GlobalParseResult with parsed content
         """
-        return self._parse_with_fallback(pdf_path, None, strategy, **options)
+        return self._parse_cached(pdf_path, None, strategy, file_hash, options, use_cache=file_hash is None)
     
     def parse_document_bytes(
         self, 
         pdf_bytes: bytes, 
         strategy: ParsingStrategy = ParsingStrategy.AUTO,
+        file_hash: Optional[str] = None,
         **options
     ) -> GlobalParseResult:
         """
@@ -92,22 +134,133 @@ class GlobalPDFParser:
         Args:
             pdf_bytes: PDF content as bytes
             strategy: Parsing strategy to use
+            file_hash: Precomputed SHA256 hash of pdf_bytes (computed if not given).
+                Callers passing it bypass the parse cache.
             **options: Additional parsing options
         
         Returns:
             GlobalParseResult with parsed content
         """
-        return self._parse_with_fallback(None, pdf_bytes, strategy, **options)
+        return self._parse_cached(None, pdf_bytes, strategy, file_hash, options, use_cache=file_hash is None)
+    
+    def _parse_cached(
+        self,
+        pdf_path: Optional[str],
+        pdf_bytes: Optional[bytes],
+        strategy: ParsingStrategy,
+        file_hash: Optional[str],
+        options: Dict[str, Any],
+        use_cache: bool = True
+    ) -> GlobalParseResult:
+        """Parse with fallback, reusing the result of an earlier parse of the same content."""
+        if file_hash is None:
+            file_hash = self._hash_content(pdf_path, pdf_bytes)
+        if not use_cache:
+            return self._parse_with_fallback(pdf_path, pdf_bytes, strategy, file_hash=file_hash, **options)
+        
+        key = (file_hash, strategy.value, json.dumps(options, sort_keys=True, default=str))
+        with self._cache_lock:
+            cached = self._parse_cache.get(key)
+            if cached is not None:
+                self._parse_cache.move_to_end(key)
+                self._cache_hits += 1
+            else:
+                self._cache_misses += 1
+        if cached is not None:
+            logger.info(f"Using cached parse result for {file_hash} ({strategy.value})")
+            return pickle.loads(cached)
+        
+        result = self._parse_with_fallback(pdf_path, pdf_bytes, strategy, file_hash=file_hash, **options)
+        
+        data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > PARSE_CACHE_MAX_BYTES:
+            return result
+        with self._cache_lock:
+            replaced = self._parse_cache.pop(key, None)
+            if replaced is not None:
+                self._parse_cache_bytes -= len(replaced)
+            self._parse_cache[key] = data
+            self._parse_cache_bytes += len(data)
+            while len(self._parse_cache) > PARSE_CACHE_SIZE or self._parse_cache_bytes > PARSE_CACHE_MAX_BYTES:
+                _, evicted = self._parse_cache.popitem(last=False)
+                self._parse_cache_bytes -= len(evicted)
+        return result
+    
+    def _hash_content(self, pdf_path: Optional[str], pdf_bytes: Optional[bytes]) -> str:
+        """
+        SHA256 hash of the PDF content.
+        
+        Files are only rehashed when their path, modification time or size changed.
+        """
+        if pdf_bytes is not None:
+            return hashlib.sha256(pdf_bytes).hexdigest()
+        
+        stat = os.stat(pdf_path)
+        stat_key = (os.path.abspath(pdf_path), stat.st_mtime_ns, stat.st_size)
+        with self._cache_lock:
+            file_hash = self._path_hashes.get(stat_key)
+        if file_hash is None:
+            file_hash = self._hash_file(pdf_path, stat.st_size)
+            with self._cache_lock:
+                self._path_hashes[stat_key] = file_hash
+                while len(self._path_hashes) > PATH_HASH_CACHE_SIZE:
+                    self._path_hashes.popitem(last=False)
+        return file_hash
+    
+    @staticmethod
+    def _hash_file(pdf_path: str, size: int) -> str:
+        """
+        SHA256 hash of a file, read through a memory map.
+        
+        hashlib consumes the mapping as a buffer, so the file is hashed straight
+        from the page cache without copying it into Python-owned memory.
+        """
+        if size == 0:  # Empty files can't be mapped
+            return hashlib.sha256().hexdigest()
+        with open(pdf_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return hashlib.sha256(mapped).hexdigest()
+    
+    def invalidate_cache(self, file_hash: Optional[str] = None):
+        """
+        Drop cached parse results.
+        
+        Args:
+            file_hash: Only drop results for this content hash (all when None)
+        """
+        with self._cache_lock:
+            if file_hash is None:
+                self._parse_cache.clear()
+                self._parse_cache_bytes = 0
+            else:
+                for key in [key for key in self._parse_cache if key[0] == file_hash]:
+                    self._parse_cache_bytes -= len(self._parse_cache.pop(key))
+    
+    def get_cache_stats(self) -> Dict[str, int]:
+        """
+        Get parse cache counters.
+        
+        Returns:
+            Dictionary with hits, misses, current size and total pickled bytes
+        """
+        with self._cache_lock:
+            return {
+                'hits': self._cache_hits,
+                'misses': self._cache_misses,
+                'size': len(self._parse_cache),
+                'bytes': self._parse_cache_bytes
+            }
     
     def _parse_with_fallback(
         self,
         pdf_path: Optional[str],
         pdf_bytes: Optional[bytes],
         strategy: ParsingStrategy,
+        file_hash: Optional[str] = None,
         **options
     ) -> GlobalParseResult:
         """Parse with fallback strategy support."""
-        strategies_to_try = self.strategy_fallback.get(strategy, [ParsingStrategy.STANDARD])
+        strategies_to_try = STRATEGY_FALLBACK.get(strategy, (ParsingStrategy.STANDARD,))
         warnings = []
         last_error = None
         
@@ -115,10 +268,10 @@ class GlobalPDFParser:
             try:
                 logger.info(f"Attempting to parse with strategy: {attempt_strategy.value}")
                 
-                if attempt_strategy == ParsingStrategy.TOC:
-                    result = self._parse_with_toc(pdf_path, pdf_bytes, **options)
-                elif attempt_strategy == ParsingStrategy.STANDARD:
-                    result = self._parse_standard(pdf_path, pdf_bytes, **options)
+                if attempt_strategy is ParsingStrategy.TOC:
+                    result = self._parse_with_toc(pdf_path, pdf_bytes, file_hash=file_hash, **options)
+                elif attempt_strategy is ParsingStrategy.STANDARD:
+                    result = self._parse_standard(pdf_path, pdf_bytes, file_hash=file_hash, **options)
                 else:
                     continue
                 
@@ -142,17 +295,24 @@ class GlobalPDFParser:
         self,
         pdf_path: Optional[str],
         pdf_bytes: Optional[bytes],
+        file_hash: Optional[str] = None,
         **options
     ) -> GlobalParseResult:
         """Parse using TOC strategy."""
-        # Parse with TOC parser
-        if pdf_path:
-            toc_result = self.toc_parser.parse_document(pdf_path, **options)
-            # Also get standard parsed document for compatibility
-            parsed_doc = self.pdf_parser.parse_document(pdf_path)
-        else:
-            toc_result = self.toc_parser.parse_document_bytes(pdf_bytes, **options)
-            parsed_doc = self.pdf_parser.parse_document_from_bytes(pdf_bytes)
+        if file_hash is None:
+            file_hash = self._hash_content(pdf_path, pdf_bytes)
+        
+        # Open the PDF once and share it between the TOC parser and the
+        # standard parser instead of each opening it
+        doc = self._open_pdf(pdf_path, pdf_bytes)
+        try:
+            toc_result = self.toc_parser.parse_fitz_document(doc, pdf_path or "bytes_document", **options)
+            # Also get standard parsed document for compatibility. Its text
+            # blocks are limited to the pages the title fallback reads, since
+            # the TOC parser has already extracted the document's text.
+            parsed_doc = self.pdf_parser.parse_fitz_document(doc, file_hash, max_pages=TOC_TEXT_BLOCK_PAGES)
+        finally:
+            doc.close()
         
         # Convert TOC sections to segmented paragraphs
         paragraphs = self._convert_toc_to_paragraphs(toc_result, parsed_doc.file_hash)
@@ -169,17 +329,24 @@ class GlobalPDFParser:
             warnings=warnings
         )
     
+    def _open_pdf(self, pdf_path: Optional[str], pdf_bytes: Optional[bytes]) -> fitz.Document:
+        """Open a PDF from a path or bytes with PyMuPDF."""
+        if pdf_path:
+            return fitz.open(pdf_path)
+        return fitz.open(stream=pdf_bytes, filetype="pdf")
+    
     def _parse_standard(
         self,
         pdf_path: Optional[str],
         pdf_bytes: Optional[bytes],
+        file_hash: Optional[str] = None,
         **options
     ) -> GlobalParseResult:
         """Parse using standard strategy."""
         if pdf_path:
-            parsed_doc = self.pdf_parser.parse_document(pdf_path)
+            parsed_doc = self.pdf_parser.parse_document(pdf_path, file_hash=file_hash)
         else:
-            parsed_doc = self.pdf_parser.parse_document_from_bytes(pdf_bytes)
+            parsed_doc = self.pdf_parser.parse_document_from_bytes(pdf_bytes, file_hash=file_hash)
         
         # Segment text without external structure
         paragraphs = self.text_segmenter.segment_document(
@@ -197,175 +364,186 @@ class GlobalPDFParser:
     def _convert_toc_to_paragraphs(
         self,
         toc_result: TOCParseResult,
-        doc_id: str
+        doc_id: str,
+        min_tokens: int = 100
     ) -> List[SegmentedParagraph]:
-        """Convert TOC sections to segmented paragraphs format."""
-        from .paragraph_segmenter import SegmentedParagraph
-        import hashlib
-
-        paragraphs = []
-        global_para_idx = 0
-
-        def process_section(section, parent_path=""):
-            nonlocal global_para_idx
-
-            # Build section path - use only current section title without parent path
-            current_path = section.title
-
-            # Convert section paragraphs to SegmentedParagraph objects
-            for para_text in section.paragraphs:
-                if len(para_text.strip()) < 10:  # Skip very short paragraphs
-                    continue
-
-                # Generate stable ID for paragraph
-                hash_input = f"{doc_id}:{section.start_page}:{global_para_idx}:{para_text[:100]}"
-                stable_id = hashlib.sha256(hash_input.encode('utf-8')).hexdigest()
-
-                # Estimate bbox (simplified)
-                bbox = {
-                    'x1': 50.0,
-                    'y1': 100.0 + (global_para_idx * 20),
-                    'x2': 500.0,
-                    'y2': 120.0 + (global_para_idx * 20)
-                }
-
-                # Create segmented paragraph
-                paragraph = SegmentedParagraph(
-                    stable_id=stable_id,
-                    doc_id=doc_id,
-                    page=section.start_page,
-                    para_idx=global_para_idx,
-                    text=para_text.strip(),
-                    bbox=bbox,
-                    char_span=None,
-                    section_path=current_path,
-                    paragraph_type='paragraph',
-                    tokens=max(1, len(para_text) // 4),  # Rough estimate
-                    font_size=11.0,
-                    is_bold=False,
-                    is_italic=False
-                )
-
-                paragraphs.append(paragraph)
-                global_para_idx += 1
-
-            # Process children recursively - pass current path for context but don't use in section_path
-            for child in section.children:
-                process_section(child, current_path)
-
-        # Process all top-level sections
-        for section in toc_result.sections:
-            process_section(section)
-        
-        # Merge short paragraphs (< 100 tokens) with previous ones
-        merged_paragraphs = self._merge_short_toc_paragraphs(paragraphs)
-        
-        return merged_paragraphs
-
-    def _merge_short_toc_paragraphs(self, paragraphs: List[SegmentedParagraph], min_tokens: int = 100) -> List[SegmentedParagraph]:
         """
-        Merge TOC paragraphs with fewer than min_tokens with the previous paragraph.
+        Convert TOC sections to segmented paragraphs format.
+        
+        Paragraphs with fewer than min_tokens are merged into the previous
+        paragraph of the same section as they are produced, so each output
+        paragraph is built once, after its merge group is complete.
         
         Args:
-            paragraphs: List of segmented paragraphs
-            min_tokens: Minimum token count threshold
+            toc_result: Result of TOC-based parsing
+            doc_id: Document ID
+            min_tokens: Minimum token count threshold for merging
             
         Returns:
-            List with short paragraphs merged
+            List of segmented paragraphs with short paragraphs merged
         """
-        if not paragraphs:
-            return paragraphs
-        
-        merged_paragraphs = []
-        
-        for i, para in enumerate(paragraphs):
-            if (para.tokens < min_tokens and 
-                merged_paragraphs and  # There's a previous paragraph to merge with
-                para.paragraph_type not in ['header', 'figure_caption', 'table']):  # Don't merge special types
+        paragraphs = []
+        merged_count = 0
+
+        # Stable IDs all start with the document ID, so hash that prefix once
+        # and copy the state for each paragraph
+        doc_hash_state = hashlib.sha256(f"{doc_id}:".encode('utf-8'))
+
+        # Current merge group: the paragraph that absorbs following short
+        # paragraphs, its index before merging (stable IDs are derived from
+        # it), its raw text (hashed when nothing was merged), the text pieces
+        # and separators joined once when the group completes, and its bounds
+        group = None
+        
+        # Token estimates are a character count over CHARS_PER_TOKEN, so the
+        # merge threshold can be checked on the length directly
+        min_chars = min_tokens * CHARS_PER_TOKEN
+        
+        # Hoisted out of the loop, which runs once per TOC paragraph
+        bboxes_adjacent = self._are_toc_bboxes_vertically_adjacent
+        log_merges = logger.isEnabledFor(logging.DEBUG)
+        
+        for idx, (page, section_path, raw_text, text) in enumerate(self._iter_toc_paragraph_texts(toc_result)):
+            # Estimate bbox (simplified)
+            x1, y1, x2, y2 = 50.0, 100.0 + idx * 20, 500.0, 120.0 + idx * 20
+            
+            # Merge short paragraphs with the previous one in the same section
+            if group is not None and len(raw_text) < min_chars and section_path == group['section_path']:
+                # Check if bounding boxes are vertically adjacent
+                bbox_adjacent = bboxes_adjacent(group['bbox'], (x1, y1, x2, y2))
                 
-                # Merge with the previous paragraph
-                prev_para = merged_paragraphs[-1]
+                # Combine texts with appropriate spacing: adjacent boxes merge
+                # smoothly, otherwise add a line break for clarity
+                group['parts'].append(' ' if bbox_adjacent else '\n')
+                group['parts'].append(text)
                 
-                # Check if they're in the same section (same section_path)
-                same_section = (para.section_path == prev_para.section_path)
+                # Expand the bounding box to include both paragraphs
+                gx1, gy1, gx2, gy2 = group['bbox']
+                group['bbox'] = (min(gx1, x1), min(gy1, y1), max(gx2, x2), max(gy2, y2))
                 
-                if same_section:
-                    # Check if bounding boxes are vertically adjacent
-                    bbox_adjacent = self._are_toc_bboxes_vertically_adjacent(prev_para.bbox, para.bbox)
-                    
-                    # Combine texts with appropriate spacing
-                    if bbox_adjacent:
-                        # If bounding boxes are adjacent, merge smoothly
-                        combined_text = f"{prev_para.text.rstrip()} {para.text.lstrip()}"
-                    else:
-                        # If not adjacent, add line break for clarity
-                        combined_text = f"{prev_para.text.rstrip()}\n{para.text.lstrip()}"
-                    
-                    # Update the previous paragraph
-                    prev_para.text = combined_text
-                    prev_para.tokens = max(1, len(combined_text) // 4)  # Rough estimate
-                    
-                    # Expand bounding box to include both paragraphs intelligently
-                    if bbox_adjacent:
-                        # For adjacent boxes, create a seamless combined box
-                        prev_para.bbox['x1'] = min(prev_para.bbox['x1'], para.bbox['x1'])
-                        prev_para.bbox['y1'] = min(prev_para.bbox['y1'], para.bbox['y1'])
-                        prev_para.bbox['x2'] = max(prev_para.bbox['x2'], para.bbox['x2'])
-                        prev_para.bbox['y2'] = max(prev_para.bbox['y2'], para.bbox['y2'])
-                    else:
-                        # For non-adjacent boxes, create an encompassing box
-                        prev_para.bbox['x1'] = min(prev_para.bbox['x1'], para.bbox['x1'])
-                        prev_para.bbox['y1'] = min(prev_para.bbox['y1'], para.bbox['y1'])
-                        prev_para.bbox['x2'] = max(prev_para.bbox['x2'], para.bbox['x2'])
-                        prev_para.bbox['y2'] = max(prev_para.bbox['y2'], para.bbox['y2'])
-                    
-                    # Regenerate stable ID for the merged paragraph
-                    import hashlib
-                    hash_input = f"{prev_para.doc_id}:{prev_para.page}:{prev_para.para_idx}:{prev_para.text[:100]}"
-                    prev_para.stable_id = hashlib.sha256(hash_input.encode('utf-8')).hexdigest()
-                    
-                    logger.debug(f"Merged short TOC paragraph ({para.tokens} tokens) with previous paragraph (adjacent: {bbox_adjacent})")
-                    continue  # Skip adding the current paragraph
+                merged_count += 1
+                if log_merges:
+                    logger.debug(f"Merged short TOC paragraph ({estimate_token_count(raw_text)} tokens) with previous paragraph (adjacent: {bbox_adjacent})")
+                continue
             
-            # Add paragraph as is (not merged)
-            merged_paragraphs.append(para)
+            if group is not None:
+                paragraphs.append(self._build_toc_paragraph(group, doc_id, doc_hash_state, len(paragraphs)))
+            group = {
+                'page': page,
+                'section_path': section_path,
+                'idx': idx,
+                'raw_text': raw_text,
+                'parts': [text],
+                'bbox': (x1, y1, x2, y2)
+            }
+        
+        if group is not None:
+            paragraphs.append(self._build_toc_paragraph(group, doc_id, doc_hash_state, len(paragraphs)))
         
-        # Re-assign paragraph indices
-        for i, para in enumerate(merged_paragraphs):
-            para.para_idx = i
-        
-        merged_count = len(paragraphs) - len(merged_paragraphs)
         if merged_count > 0:
             logger.info(f"Merged {merged_count} short TOC paragraphs with previous ones")
         
-        return merged_paragraphs
+        return paragraphs
+
+    def _iter_toc_paragraph_texts(self, toc_result: TOCParseResult):
+        """
+        Yield (page, section_path, raw_text, stripped_text) for each TOC paragraph.
+        
+        Sections are walked depth-first with an explicit stack, children pushed
+        in reverse so they are visited in document order. Very short paragraphs
+        are skipped.
+        """
+        stack = list(reversed(toc_result.sections))
+
+        while stack:
+            section = stack.pop()
+
+            # Build section path - use only current section title without parent path
+            current_path = section.title
+            page = section.start_page
+
+            for para_text in section.paragraphs:
+                # Skip very short paragraphs. Stripping never lengthens text,
+                # so short raw strings are rejected before stripping them.
+                if len(para_text) < MIN_TOC_PARAGRAPH_CHARS:
+                    continue
+                text = para_text.strip()
+                if len(text) < MIN_TOC_PARAGRAPH_CHARS:
+                    continue
+                yield page, current_path, para_text, text
 
-    def _are_toc_bboxes_vertically_adjacent(self, bbox1: Dict[str, float], bbox2: Dict[str, float], tolerance: float = 25.0) -> bool:
+            stack.extend(reversed(section.children))
+
+    def _build_toc_paragraph(
+        self,
+        group: Dict[str, Any],
+        doc_id: str,
+        doc_hash_state,
+        para_idx: int
+    ) -> SegmentedParagraph:
+        """Build the SegmentedParagraph for a completed TOC merge group."""
+        # Unmerged paragraphs keep the ID of their raw text, merged ones are
+        # identified by the combined text
+        parts = group['parts']
+        merged = len(parts) > 1
+        text = ''.join(parts) if merged else parts[0]
+        stable_text = text if merged else group['raw_text']
+        x1, y1, x2, y2 = group['bbox']
+
+        return SegmentedParagraph(
+            stable_id=self._toc_stable_id(doc_hash_state, group['page'], group['idx'], stable_text),
+            doc_id=doc_id,
+            page=group['page'],
+            para_idx=para_idx,
+            text=text,
+            bbox={'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2},
+            char_span=None,
+            section_path=group['section_path'],
+            paragraph_type='paragraph',
+            tokens=estimate_token_count(text if merged else group['raw_text']),
+            font_size=11.0,
+            is_bold=False,
+            is_italic=False
+        )
+
+    @staticmethod
+    def _toc_stable_id(doc_hash_state, page: int, para_idx: int, text: str) -> str:
+        """
+        Generate a TOC paragraph stable ID from a pre-hashed "{doc_id}:" state.
+
+        Produces the same digest as hashing "{doc_id}:{page}:{para_idx}:{text[:100]}".
+        """
+        h = doc_hash_state.copy()
+        h.update(f"{page}:{para_idx}:{text[:100]}".encode('utf-8'))
+        return h.hexdigest()
+
+    @staticmethod
+    def _are_toc_bboxes_vertically_adjacent(
+        bbox1: Tuple[float, float, float, float],
+        bbox2: Tuple[float, float, float, float],
+        tolerance: float = 25.0
+    ) -> bool:
         """
         Check if two TOC bounding boxes are vertically adjacent.
         
         Args:
-            bbox1: First bounding box
-            bbox2: Second bounding box  
+            bbox1: First bounding box as (x1, y1, x2, y2)
+            bbox2: Second bounding box as (x1, y1, x2, y2)
             tolerance: Allowed gap between boxes to consider them adjacent
             
         Returns:
             True if boxes are vertically adjacent
         """
-        # Check if they overlap horizontally (same column)
-        horizontal_overlap = not (bbox1['x2'] < bbox2['x1'] or bbox2['x2'] < bbox1['x1'])
-        
-        if not horizontal_overlap:
-            return False
-        
-        # Check vertical adjacency
-        # Case 1: bbox1 is above bbox2
-        gap1 = abs(bbox2['y1'] - bbox1['y2'])
-        # Case 2: bbox2 is above bbox1  
-        gap2 = abs(bbox1['y1'] - bbox2['y2'])
-        
-        # Consider adjacent if gap is within tolerance
-        return min(gap1, gap2) <= tolerance
+        ax1, ay1, ax2, ay2 = bbox1
+        bx1, by1, bx2, by2 = bbox2
+        
+        # Adjacent when the boxes overlap horizontally (same column) and the
+        # gap below bbox1 (y1 of bbox2 - y2 of bbox1) or above it (y1 of bbox1
+        # - y2 of bbox2) is within tolerance
+        return (
+            ax2 >= bx1 and bx2 >= ax1 and
+            (-tolerance <= by1 - ay2 <= tolerance or -tolerance <= ay1 - by2 <= tolerance)
+        )
     
     def get_available_strategies(self) -> Dict[str, bool]:
         """
@@ -393,15 +571,17 @@ class GlobalPDFParser:
         """
         # Quick analysis to recommend strategy
         try:
-            # Try to get TOC to see if document has structure
-            if pdf_path:
-                import fitz
-                doc = fitz.open(pdf_path)
-            else:
-                doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+            # Documents that provably have no outline can't have a TOC, so
+            # skip opening them with PyMuPDF
+            if not self._may_have_outlines(pdf_path, pdf_bytes):
+                return ParsingStrategy.STANDARD
             
-            toc = doc.get_toc()
-            doc.close()
+            # Try to get TOC to see if document has structure
+            doc = self._open_pdf(pdf_path, pdf_bytes)
+            try:
+                toc = doc.get_toc()
+            finally:
+                doc.close()
             
             # If document has TOC, prefer TOC strategy
             if toc and len(toc) > 2:  # More than just title page entries
@@ -413,6 +593,25 @@ class GlobalPDFParser:
         except Exception:
             return ParsingStrategy.STANDARD
     
+    @staticmethod
+    def _may_have_outlines(pdf_path: Optional[str], pdf_bytes: Optional[bytes]) -> bool:
+        """
+        Cheaply check whether a PDF might contain an outline (bookmarks).
+        
+        The document catalog references the outline through an /Outlines key.
+        When the raw bytes contain neither that key nor an object stream
+        (/ObjStm, where compressed objects could hide it), the document has no
+        outline. Otherwise the answer is unknown and True is returned.
+        """
+        if pdf_bytes is not None:
+            return b"/Outlines" in pdf_bytes or b"/ObjStm" in pdf_bytes
+        
+        if os.path.getsize(pdf_path) == 0:  # Empty files can't be mapped
+            return False
+        with open(pdf_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped.find(b"/Outlines") != -1 or mapped.find(b"/ObjStm") != -1
+    
     def parse_with_multiple_strategies(
         self,
         pdf_path: Optional[str] = None,
@@ -439,13 +638,17 @@ class GlobalPDFParser:
             ]
         
         results = {}
+        if not strategies:
+            return results
+        
+        # Hash the content once for every strategy's cache lookup
+        file_hash = self._hash_content(pdf_path, pdf_bytes)
         
+        # Strategies run one after another: PyMuPDF isn't thread-safe and holds
+        # the GIL during extraction, so threads would gain nothing
         for strategy in strategies:
             try:
-                if pdf_path:
-                    result = self.parse_document(pdf_path, strategy, **options)
-                else:
-                    result = self.parse_document_bytes(pdf_bytes, strategy, **options)
+                result = self._parse_cached(pdf_path, pdf_bytes, strategy, file_hash, options)
                 results[strategy] = result
                 logger.info(f"Successfully parsed with {strategy.value} strategy")
             except Exception as e:
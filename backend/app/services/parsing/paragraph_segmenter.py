@@ -1,21 +1,91 @@
 """
 Text segmentation service for creating coherent paragraphs with stable IDs.
 """
+import functools
 import hashlib
 import re
-import statistics
 import unicodedata
 from typing import Dict, List, Optional, Tuple, Set
 from dataclasses import dataclass
 from collections import defaultdict
 import logging
 
+import numpy as np
+
 from .pdf_content_extractor import TextBlock, ParsedDocument, TocEntry
 
 logger = logging.getLogger(__name__)
 
+# Average characters per token used for token estimates
+CHARS_PER_TOKEN = 4
+
+
+def estimate_token_count(text: str) -> int:
+    """
+    Estimate token count for text (rough approximation).
+    
+    Shared by the standard and TOC parsing paths so paragraph token counts
+    are comparable across strategies.
+    """
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _compile_union(patterns: List[str], flags: int = 0) -> re.Pattern:
+    """Compile a list of regex patterns into one alternation matching any of them."""
+    return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns), flags)
+
+
+# Number of normalized texts kept by normalize_text
+NORMALIZED_TEXT_CACHE_SIZE = 8192
 
-@dataclass
+# Text cleanup patterns
+WHITESPACE_PATTERN = re.compile(r'\s+')
+HYPHENATION_PATTERN = re.compile(r'(\w+)-\s+(\w+)')
+
+# Section header detection: numbered ("2.1 Background"), lettered
+# ("B.1 Background") and Roman numeral ("iv. Results") headings
+NUMBERED_SECTION_PATTERN = re.compile(r'^\d+(\.\d+)*\.?\s+[a-zA-Z]')
+LETTERED_SECTION_PATTERN = re.compile(r'^[A-Z](\.\d+)*\.?\s+[a-zA-Z]')
+ROMAN_SECTION_PATTERN = re.compile(r'^[ivxlcdm]+\.?\s+[a-zA-Z]', re.IGNORECASE)
+
+# Section-like text that counts as a header when formatted
+SECTION_LIKE_PATTERN = _compile_union([
+    r'^\d+\.\s*[A-Z][a-z]',  # "1. Introduction"
+    r'^[A-Z][a-z]+\s+\d+',   # "Section 1"
+    r'^[A-Z][a-z]+\s+[A-Z]', # "Related Work"
+    r'^[A-Z]{2,}',           # All caps headers
+])
+
+# Numbering prefixes stripped from section titles. Roman numerals are only
+# stripped in lowercase so titles like "Introduction" keep their first letter.
+NUMBER_PREFIX_PATTERN = re.compile(r'^\d+(\.\d+)*\.?\s*')
+LETTER_PREFIX_PATTERN = re.compile(r'^[A-Z](\.\d+)+\.?\s*')
+ROMAN_PREFIX_PATTERN = re.compile(r'^[ivxlcdm]+\.?\s*')
+LEADING_NUMBER_PATTERN = re.compile(r'^\d+')
+
+# Bibliographic reference markers, counted individually
+REFERENCE_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'\d{4}[\.;]',  # Year
+    r'et al\.?',    # Et al
+    r'pp?\.\s*\d+', # Page numbers
+    r'vol\.?\s*\d+', # Volume
+    r'doi:', # DOI
+    r'arxiv:', # ArXiv
+))
+
+# Header paragraphs not worth saving: standalone section numbers and single words
+SECTION_NUMBER_ONLY_PATTERN = re.compile(r'^\d+(\.\d+)*\.?\s*$')  # Just numbers like "2.1"
+SINGLE_WORD_PATTERN = re.compile(r'^[A-Z][a-z]*\s*$')                # Single words like "Introduction"
+
+# Paragraphs that are just subsection indicators
+SUBSECTION_INDICATOR_PATTERN = _compile_union([
+    r'^\d+(\.\d+)+\s*$',  # Just numbers like "2.1.3"
+    r'^[A-Z]\.\d+\s*$',   # Like "A.1"
+    r'^[ivxlcdm]+\.\s*$', # Roman numerals like "iv."
+], re.IGNORECASE)
+
+
+@dataclass(slots=True)
 class SegmentedParagraph:
     """Represents a segmented paragraph with metadata."""
     stable_id: str
@@ -33,6 +103,31 @@ class SegmentedParagraph:
     is_italic: bool
 
 
+@functools.lru_cache(maxsize=NORMALIZED_TEXT_CACHE_SIZE)
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for consistent processing.
+    
+    Applies NFKC normalization, replaces common ligatures and collapses
+    whitespace. Results are cached since the same block text is normalized
+    by several segmentation passes.
+    """
+    # NFKC leaves ASCII unchanged and the ligatures are non-ASCII, so ASCII
+    # text only needs its whitespace normalized
+    if text.isascii():
+        return WHITESPACE_PATTERN.sub(' ', text.strip())
+    
+    # Unicode normalization
+    text = unicodedata.normalize('NFKC', text)
+    
+    # Replace common ligatures
+    text = text.replace('ﬁ', 'fi').replace('ﬂ', 'fl')
+    text = text.replace('ﬀ', 'ff').replace('ﬃ', 'ffi').replace('ﬄ', 'ffl')
+    
+    # Normalize whitespace
+    return WHITESPACE_PATTERN.sub(' ', text.strip())
+
+
 class TextSegmenter:
     """
     Text segmentation service that creates coherent paragraphs from text blocks
@@ -78,6 +173,28 @@ class TextSegmenter:
             r'^\d+[\.\)]\s+'                    # Numbers 1., 1)
         ]
         
+        # Typical paragraph starters
+        self.paragraph_starters = [
+            r'^[A-Z][a-z].*\.',  # Sentence starting with capital letter
+            r'^In\s+',           # "In this paper", "In order to"
+            r'^The\s+',          # "The main", "The purpose"
+            r'^This\s+',         # "This paper", "This approach"
+            r'^We\s+',           # "We present", "We propose"
+            r'^Our\s+',          # "Our method", "Our approach"
+            r'^However,',        # Transition words
+            r'^Therefore,',
+            r'^Furthermore,',
+            r'^Moreover,',
+            r'^Additionally,',
+        ]
+        
+        # Each pattern list compiled into a single alternation, so a block is
+        # checked against a whole category with one match/search call
+        self._re_figure = _compile_union(self.figure_patterns, re.IGNORECASE)
+        self._re_table = _compile_union(self.table_patterns, re.IGNORECASE)
+        self._re_list = _compile_union(self.list_patterns, re.IGNORECASE)
+        self._re_paragraph_starter = _compile_union(self.paragraph_starters)
+        
         # Common section headers to help with path extraction
         self.section_headers = {
             'abstract', 'introduction', 'background', 'related work', 'methodology',
@@ -94,6 +211,12 @@ class TextSegmenter:
             'comparison', 'performance', 'benchmarks', 'validation',
             'verification', 'testing', 'simulation', 'implementation details'
         }
+        
+        # Partial header matching in one pass each: a regex alternation finds
+        # any known header inside a text, and a NUL-joined string of all
+        # headers finds texts that are part of a known header
+        self._re_known_header = re.compile('|'.join(map(re.escape, self.section_headers)))
+        self._known_headers_joined = '\x00'.join(self.section_headers)
     
     def _normalize_text(self, text: str) -> str:
         """
@@ -105,17 +228,7 @@ class TextSegmenter:
         Returns:
             Normalized text
         """
-        # Unicode normalization
-        text = unicodedata.normalize('NFKC', text)
-        
-        # Replace common ligatures
-        text = text.replace('ﬁ', 'fi').replace('ﬂ', 'fl')
-        text = text.replace('ﬀ', 'ff').replace('ﬃ', 'ffi').replace('ﬄ', 'ffl')
-        
-        # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text.strip())
-        
-        return text
+        return normalize_text(text)
     
     def _fix_hyphens(self, text: str) -> str:
         """
@@ -128,9 +241,9 @@ class TextSegmenter:
             Text with fixed hyphenation
         """
         # Fix "auto-\nmatic" and "auto- matic" → "automatic"
-        text = re.sub(r'(\w+)-\s+(\w+)', 
-                     lambda m: m.group(1) + m.group(2) 
-                     if m.group(2)[0].islower() else m.group(0), text)
+        text = HYPHENATION_PATTERN.sub(
+            lambda m: m.group(1) + m.group(2)
+            if m.group(2)[0].islower() else m.group(0), text)
         return text
     
     def _calculate_page_stats(self, blocks: List[TextBlock]) -> Tuple[float, float, float]:
@@ -146,27 +259,24 @@ class TextSegmenter:
         if not blocks:
             return 10.0, 11.0, 3.0
         
-        # Calculate line heights
-        line_heights = [block.bbox.y2 - block.bbox.y1 for block in blocks]
-        
-        # Calculate font sizes
-        font_sizes = [block.font_size for block in blocks]
+        # One row per block: x1, y1, y2, font size, page number
+        stats = np.array(
+            [(b.bbox.x1, b.bbox.y1, b.bbox.y2, b.font_size, b.page_num) for b in blocks],
+            dtype=np.float64
+        )
+        x1, y1, y2, font_sizes, page_nums = stats.T
         
-        # Calculate gaps between consecutive blocks on same page
-        gaps = []
-        sorted_blocks = sorted(blocks, key=lambda b: (b.bbox.y1, b.bbox.x1))
-        for i in range(len(sorted_blocks) - 1):
-            curr_block = sorted_blocks[i]
-            next_block = sorted_blocks[i + 1]
-            if next_block.page_num == curr_block.page_num:
-                gap = next_block.bbox.y1 - curr_block.bbox.y2
-                if gap > 0:
-                    gaps.append(gap)
+        # Calculate line heights and font sizes
+        median_height = float(np.median(y2 - y1))
+        median_font = float(np.median(font_sizes))
         
-        # Calculate medians
-        median_height = statistics.median(line_heights) if line_heights else 10.0
-        median_font = statistics.median(font_sizes) if font_sizes else 11.0
-        median_gap = statistics.median(gaps) if gaps else 3.0
+        # Calculate gaps between consecutive blocks on same page, in reading
+        # order (top to bottom, then left to right; lexsort is stable)
+        order = np.lexsort((x1, y1))
+        y1, y2, page_nums = y1[order], y2[order], page_nums[order]
+        gaps = y1[1:] - y2[:-1]
+        gaps = gaps[(page_nums[1:] == page_nums[:-1]) & (gaps > 0)]
+        median_gap = float(np.median(gaps)) if gaps.size else 3.0
         
         return median_height, median_font, median_gap
     
@@ -697,23 +807,8 @@ class TextSegmenter:
         text = block.text.strip()
         
         # Check if text starts with typical paragraph starters
-        paragraph_starters = [
-            r'^[A-Z][a-z].*\.',  # Sentence starting with capital letter
-            r'^In\s+',           # "In this paper", "In order to"
-            r'^The\s+',          # "The main", "The purpose"
-            r'^This\s+',         # "This paper", "This approach"
-            r'^We\s+',           # "We present", "We propose"
-            r'^Our\s+',          # "Our method", "Our approach"
-            r'^However,',        # Transition words
-            r'^Therefore,',
-            r'^Furthermore,',
-            r'^Moreover,',
-            r'^Additionally,',
-        ]
-        
-        for pattern in paragraph_starters:
-            if re.match(pattern, text) and vertical_gap > 1.0:
-                return True
+        if vertical_gap > 1.0 and self._re_paragraph_starter.match(text):
+            return True
         
         # Check for indentation changes (new paragraph often indented)
         x_diff = abs(block.bbox.x1 - last_block.bbox.x1)
@@ -753,33 +848,25 @@ class TextSegmenter:
             return is_formatted
         
         # Check for partial matches with known headers
-        for header in self.section_headers:
-            if header in text_lower or text_lower in header:
-                return is_formatted
+        if self._re_known_header.search(text_lower) or (
+                '\x00' not in text_lower and text_lower in self._known_headers_joined):
+            return is_formatted
         
         # Check for numbered sections (e.g., "1. Introduction", "2.1 Background")
-        if re.match(r'^\d+(\.\d+)*\.?\s+[a-zA-Z]', text):
+        if NUMBERED_SECTION_PATTERN.match(text):
             return True
         
         # Check for lettered sections (e.g., "A. Introduction", "B.1 Background")
-        if re.match(r'^[A-Z](\.\d+)*\.?\s+[a-zA-Z]', text):
+        if LETTERED_SECTION_PATTERN.match(text):
             return True
         
         # Check for Roman numerals
-        if re.match(r'^[ivxlcdm]+\.?\s+[a-zA-Z]', text, re.IGNORECASE):
+        if ROMAN_SECTION_PATTERN.match(text):
             return True
         
         # Check for section-like patterns
-        section_patterns = [
-            r'^\d+\.\s*[A-Z][a-z]',  # "1. Introduction"
-            r'^[A-Z][a-z]+\s+\d+',   # "Section 1"
-            r'^[A-Z][a-z]+\s+[A-Z]', # "Related Work"
-            r'^[A-Z]{2,}',           # All caps headers
-        ]
-        
-        for pattern in section_patterns:
-            if re.match(pattern, text) and is_formatted:
-                return True
+        if is_formatted and SECTION_LIKE_PATTERN.match(text):
+            return True
         
         # Check if text looks like a title (mostly capitalized words)
         words = text.split()
@@ -794,17 +881,8 @@ class TextSegmenter:
         """Check if text is a figure or table caption."""
         text_lower = text.lower().strip()
         
-        # Check figure patterns
-        for pattern in self.figure_patterns:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                return True
-        
-        # Check table patterns
-        for pattern in self.table_patterns:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                return True
-        
-        return False
+        # Check figure and table patterns
+        return bool(self._re_figure.search(text_lower) or self._re_table.search(text_lower))
     
     def _extract_section_path(self, block: TextBlock, section_map: Dict[str, str]) -> Optional[str]:
         """
@@ -853,17 +931,17 @@ class TextSegmenter:
         original_title = title.strip()
         
         # Remove leading numbers and dots (e.g., "1.2.3 Title" -> "Title")
-        cleaned = re.sub(r'^\d+(\.\d+)*\.?\s*', '', title)
+        cleaned = NUMBER_PREFIX_PATTERN.sub('', title)
         
         # Remove leading single letters with dots only if followed by numbers (e.g., "A.1 Title" -> "Title")
         # This prevents removing the first letter of actual titles like "Model Architecture"
-        cleaned = re.sub(r'^[A-Z](\.\d+)+\.?\s*', '', cleaned)
+        cleaned = LETTER_PREFIX_PATTERN.sub('', cleaned)
         
         # Remove Roman numerals with dots/spaces (e.g., "IV. Title" -> "Title")
-        cleaned = re.sub(r'^[ivxlcdm]+\.?\s*', '', cleaned, re.IGNORECASE)
+        cleaned = ROMAN_PREFIX_PATTERN.sub('', cleaned)
         
         # Normalize whitespace
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+        cleaned = WHITESPACE_PATTERN.sub(' ', cleaned).strip()
         
         # If cleaning removed everything, use original title
         if not cleaned or len(cleaned) < 2:
@@ -973,19 +1051,16 @@ class TextSegmenter:
         text_lower = text.lower().strip()
         
         # Check for list items first
-        for pattern in self.list_patterns:
-            if re.match(pattern, text, re.IGNORECASE):
-                return 'list_item'
+        if self._re_list.match(text):
+            return 'list_item'
         
         # Check for figure captions
-        for pattern in self.figure_patterns:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                return 'figure_caption'
+        if self._re_figure.search(text_lower):
+            return 'figure_caption'
         
         # Check for table captions
-        for pattern in self.table_patterns:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                return 'table'
+        if self._re_table.search(text_lower):
+            return 'table'
         
         # Check for references section content
         if ('references' in text_lower and len(text) < 100) or self._looks_like_reference(text):
@@ -1008,18 +1083,9 @@ class TextSegmenter:
     
     def _looks_like_reference(self, text: str) -> bool:
         """Check if text looks like a bibliographic reference."""
-        # Common patterns in references
-        ref_patterns = [
-            r'\d{4}[\.;]',  # Year
-            r'et al\.?',    # Et al
-            r'pp?\.\s*\d+', # Page numbers
-            r'vol\.?\s*\d+', # Volume
-            r'doi:', # DOI
-            r'arxiv:', # ArXiv
-        ]
-        
+        # Count common patterns in references
         text_lower = text.lower()
-        matches = sum(1 for pattern in ref_patterns if re.search(pattern, text_lower))
+        matches = sum(1 for pattern in REFERENCE_PATTERNS if pattern.search(text_lower))
         
         # If multiple reference patterns match, likely a reference
         return matches >= 2
@@ -1076,7 +1142,7 @@ class TextSegmenter:
             Estimated token count
         """
         # Simple approximation: ~4 characters per token on average
-        return max(1, len(text) // 4)
+        return estimate_token_count(text)
     
     def update_char_spans(self, paragraphs: List[SegmentedParagraph], full_text: str) -> None:
         """
@@ -1137,20 +1203,12 @@ class TextSegmenter:
         # Don't save standalone section numbers or very short headers
         if (len(text) < 30 and 
             paragraph.paragraph_type == 'header' and
-            (re.match(r'^\d+(\.\d+)*\.?\s*$', text) or  # Just numbers like "2.1"
-             re.match(r'^[A-Z][a-z]*\s*$', text))):     # Single words like "Introduction"
+            (SECTION_NUMBER_ONLY_PATTERN.match(text) or SINGLE_WORD_PATTERN.match(text))):
             return False
         
         # Don't save paragraphs that are just subsection indicators
-        subsection_patterns = [
-            r'^\d+(\.\d+)+\s*$',  # Just numbers like "2.1.3"
-            r'^[A-Z]\.\d+\s*$',   # Like "A.1"
-            r'^[ivxlcdm]+\.\s*$', # Roman numerals like "iv."
-        ]
-        
-        for pattern in subsection_patterns:
-            if re.match(pattern, text, re.IGNORECASE):
-                return False
+        if SUBSECTION_INDICATOR_PATTERN.match(text):
+            return False
         
         return True
     
@@ -1311,7 +1369,7 @@ class TextSegmenter:
                 specificity_score = 0
 
                 # Higher score for numbered sections (e.g., "1 Introduction" vs "Introduction")
-                if re.match(r'^\d+', para.section_path.strip()):
+                if LEADING_NUMBER_PATTERN.match(para.section_path.strip()):
                     specificity_score += 15
 
                 # Additional score for subsection indicators (e.g., "1.1 Subsection")
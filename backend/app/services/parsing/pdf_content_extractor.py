@@ -2,7 +2,9 @@
 PDF parsing service using PyMuPDF for text extraction with bbox coordinates.
 """
 import fitz  # PyMuPDF
+import functools
 import hashlib
+import itertools
 import re
 import logging
 from typing import Dict, List, Optional, Tuple, Any
@@ -11,6 +13,16 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Flags for page.get_text("dict"): the defaults minus image preservation, so
+# image blocks don't carry their decoded image bytes. Only text blocks are used.
+TEXT_DICT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+# Numbering prefixes stripped from TOC titles ("2.1. ", "A.1 ") and runs of
+# whitespace collapsed in them
+TOC_NUMBER_PREFIX_PATTERN = re.compile(r'^\d+(\.\d+)*\.?\s*')
+TOC_LETTER_PREFIX_PATTERN = re.compile(r'^[A-Z](\.\d+)+\.?\s*')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
 
 @dataclass
 class BoundingBox:
@@ -79,10 +91,9 @@ class TocEntry:
     def __post_init__(self):
         if self.title_clean is None:
             # Clean title by removing numbering
-            import re
-            cleaned = re.sub(r'^\d+(\.\d+)*\.?\s*', '', self.title)
-            cleaned = re.sub(r'^[A-Z](\.\d+)+\.?\s*', '', cleaned)
-            cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+            cleaned = TOC_NUMBER_PREFIX_PATTERN.sub('', self.title)
+            cleaned = TOC_LETTER_PREFIX_PATTERN.sub('', cleaned)
+            cleaned = WHITESPACE_PATTERN.sub(' ', cleaned).strip()
             self.title_clean = cleaned if cleaned else self.title
 
 
@@ -107,86 +118,96 @@ class PDFParser:
         self.min_font_size = 6.0  # Minimum font size to consider
         self.max_font_size = 72.0  # Maximum font size to consider
     
-    def parse_document(self, pdf_path: str) -> ParsedDocument:
+    def parse_document(self, pdf_path: str, file_hash: Optional[str] = None) -> ParsedDocument:
         """
         Parse a PDF document and extract text blocks with coordinates.
         
         Args:
             pdf_path: Path to the PDF file
+            file_hash: Precomputed SHA256 hash of the file (computed if not given)
             
         Returns:
             ParsedDocument with metadata and text blocks
         """
         # Calculate file hash
-        file_hash = self._calculate_file_hash(pdf_path)
+        if file_hash is None:
+            file_hash = self._calculate_file_hash(pdf_path)
         
         # Open PDF document
         doc = fitz.open(pdf_path)
         
         try:
-            # Extract metadata
-            metadata = self._extract_metadata(doc)
-            
-            # Extract text blocks from all pages
-            text_blocks = []
-            for page_num in range(len(doc)):
-                page_blocks = self._extract_page_text_blocks(doc[page_num], page_num)
-                text_blocks.extend(page_blocks)
-            
-            # Extract table of contents
-            toc_entries = self._extract_toc(doc)
-            
-            return ParsedDocument(
-                metadata=metadata,
-                text_blocks=text_blocks,
-                page_count=len(doc),
-                file_hash=file_hash,
-                toc_entries=toc_entries
-            )
+            return self.parse_fitz_document(doc, file_hash)
         
         finally:
             doc.close()
     
-    def parse_document_from_bytes(self, pdf_bytes: bytes) -> ParsedDocument:
+    def parse_document_from_bytes(self, pdf_bytes: bytes, file_hash: Optional[str] = None) -> ParsedDocument:
         """
         Parse a PDF document from bytes and extract text blocks with coordinates.
         
         Args:
             pdf_bytes: PDF file content as bytes
+            file_hash: Precomputed SHA256 hash of pdf_bytes (computed if not given)
             
         Returns:
             ParsedDocument with metadata and text blocks
         """
         # Calculate file hash
-        file_hash = hashlib.sha256(pdf_bytes).hexdigest()
+        if file_hash is None:
+            file_hash = hashlib.sha256(pdf_bytes).hexdigest()
         
         # Open PDF document from bytes
         doc = fitz.open(stream=pdf_bytes, filetype="pdf")
         
         try:
-            # Extract metadata
-            metadata = self._extract_metadata(doc)
-            
-            # Extract text blocks from all pages
-            text_blocks = []
-            for page_num in range(len(doc)):
-                page_blocks = self._extract_page_text_blocks(doc[page_num], page_num)
-                text_blocks.extend(page_blocks)
-            
-            # Extract table of contents
-            toc_entries = self._extract_toc(doc)
-            
-            return ParsedDocument(
-                metadata=metadata,
-                text_blocks=text_blocks,
-                page_count=len(doc),
-                file_hash=file_hash,
-                toc_entries=toc_entries
-            )
+            return self.parse_fitz_document(doc, file_hash)
         
         finally:
             doc.close()
     
+    def parse_fitz_document(
+        self,
+        doc: fitz.Document,
+        file_hash: str,
+        max_pages: Optional[int] = None
+    ) -> ParsedDocument:
+        """
+        Extract text blocks with coordinates from an open PyMuPDF document.
+        
+        The caller owns the document and is responsible for closing it.
+        
+        Args:
+            doc: Open PyMuPDF document
+            file_hash: SHA256 hash of the PDF content
+            max_pages: Only extract text blocks from the first max_pages pages
+                (all pages if None). Metadata, page count and TOC always cover
+                the whole document.
+            
+        Returns:
+            ParsedDocument with metadata and text blocks
+        """
+        # Extract metadata
+        metadata = self._extract_metadata(doc)
+        
+        # Extract text blocks from all (or the first max_pages) pages
+        text_blocks = []
+        block_pages = len(doc) if max_pages is None else min(max_pages, len(doc))
+        for page_num in range(block_pages):
+            page_blocks = self._extract_page_text_blocks(doc[page_num], page_num)
+            text_blocks.extend(page_blocks)
+        
+        # Extract table of contents
+        toc_entries = self._extract_toc(doc)
+        
+        return ParsedDocument(
+            metadata=metadata,
+            text_blocks=text_blocks,
+            page_count=len(doc),
+            file_hash=file_hash,
+            toc_entries=toc_entries
+        )
+    
     def _calculate_file_hash(self, pdf_path: str) -> str:
         """Calculate SHA256 hash of the PDF file."""
         hash_sha256 = hashlib.sha256()
@@ -243,7 +264,7 @@ class PDFParser:
         text_blocks = []
         
         # Get text blocks with detailed information
-        blocks = page.get_text("dict")
+        blocks = page.get_text("dict", flags=TEXT_DICT_FLAGS)
         
         block_idx = 0
         for block in blocks.get("blocks", []):
@@ -427,8 +448,10 @@ class PDFParser:
         if not text_blocks:
             return None
         
-        # Look for title in first page, typically largest font size
-        first_page_blocks = [block for block in text_blocks if block.page_num == 1]
+        # Look for title in first page, typically largest font size. Blocks are
+        # stored in page order, so stop at the first block past page 1 instead
+        # of scanning the whole document.
+        first_page_blocks = list(itertools.takewhile(lambda b: b.page_num == 1, text_blocks))
         if not first_page_blocks:
             return None
         
@@ -515,4 +538,15 @@ class PDFParser:
             logger.warning(f"Failed to extract TOC: {e}")
         
         logger.info(f"Extracted {len(toc_entries)} TOC entries")
-        return toc_entries
\ No newline at end of file
+        return toc_entries
+
+
+@functools.lru_cache(maxsize=1)
+def get_pdf_parser() -> PDFParser:
+    """
+    Get the process-wide PDF parser instance.
+    
+    PDFParser holds no per-document state after construction, so a single
+    instance is shared by every caller.
+    """
+    return PDFParser()
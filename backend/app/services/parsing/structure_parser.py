@@ -4,6 +4,7 @@ Based on the advanced algorithm from test.py with support for missing sections d
 reference parsing, and citation linking.
 """
 import fitz  # PyMuPDF
+import functools
 import hashlib
 import re
 import difflib
@@ -13,6 +14,8 @@ from typing import List, Tuple, Optional, Dict, Any, Set
 from pathlib import Path
 import logging
 
+from .pdf_content_extractor import TEXT_DICT_FLAGS
+
 logger = logging.getLogger(__name__)
 
 
@@ -132,9 +135,10 @@ class TOCParser:
         """
         try:
             doc = fitz.open(pdf_path)
-            result = self._extract_sections_from_doc(doc, pdf_path, **options)
-            doc.close()
-            return result
+            try:
+                return self.parse_fitz_document(doc, pdf_path, **options)
+            finally:
+                doc.close()
         except Exception as e:
             logger.error(f"Error parsing PDF {pdf_path}: {e}")
             raise
@@ -152,13 +156,30 @@ class TOCParser:
         """
         try:
             doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-            result = self._extract_sections_from_doc(doc, "bytes_document", **options)
-            doc.close()
-            return result
+            try:
+                return self.parse_fitz_document(doc, "bytes_document", **options)
+            finally:
+                doc.close()
         except Exception as e:
             logger.error(f"Error parsing PDF from bytes: {e}")
             raise
     
+    def parse_fitz_document(self, doc: fitz.Document, pdf_path: str = "bytes_document", **options) -> TOCParseResult:
+        """
+        Parse an open PyMuPDF document using TOC-based approach.
+        
+        The caller owns the document and is responsible for closing it.
+        
+        Args:
+            doc: Open PyMuPDF document
+            pdf_path: Source path reported in the result
+            **options: Parsing options
+        
+        Returns:
+            TOCParseResult with parsed structure
+        """
+        return self._extract_sections_from_doc(doc, pdf_path, **options)
+    
     def _extract_sections_from_doc(
         self, 
         doc: fitz.Document, 
@@ -324,7 +345,7 @@ class TOCParser:
         Enhanced with multiple search strategies.
         """
         try:
-            pd = page.get_text("dict")
+            pd = page.get_text("dict", flags=TEXT_DICT_FLAGS)
         except Exception:
             return None
 
@@ -608,7 +629,7 @@ class TOCParser:
         for page_num in sorted(extended_pages):
             try:
                 page = doc.load_page(page_num)
-                blocks = page.get_text("dict").get("blocks", [])
+                blocks = page.get_text("dict", flags=TEXT_DICT_FLAGS).get("blocks", [])
 
                 for block in blocks:
                     if block.get("type") != 0:  # Skip non-text blocks
@@ -772,7 +793,7 @@ class TOCParser:
         for page_num in range(search_pages):
             try:
                 page = doc.load_page(page_num)
-                blocks = page.get_text("dict").get("blocks", [])
+                blocks = page.get_text("dict", flags=TEXT_DICT_FLAGS).get("blocks", [])
 
                 for block in blocks:
                     if block.get("type") != 0:  # Skip non-text blocks
@@ -929,7 +950,7 @@ class TOCParser:
     def _is_two_column_layout(self, page: fitz.Page) -> bool:
         """Detect if a page has a two-column layout."""
         try:
-            blocks = page.get_text("dict").get("blocks", [])
+            blocks = page.get_text("dict", flags=TEXT_DICT_FLAGS).get("blocks", [])
             if len(blocks) < 4:
                 return False
             
@@ -1124,11 +1145,13 @@ class TOCParser:
         return out
     
     def _flatten_children_intervals(self, node: TOCEntry) -> List[Tuple[int, int]]:
-        """Get all children page intervals recursively."""
+        """Get all descendant page intervals, walking the subtree with an explicit stack."""
         acc: List[Tuple[int, int]] = []
-        for ch in node.children:
+        stack = list(reversed(node.children))
+        while stack:
+            ch = stack.pop()
             acc.append((ch.start_page, ch.end_page))
-            acc.extend(self._flatten_children_intervals(ch))
+            stack.extend(reversed(ch.children))
         return acc
     
     def _extract_links_from_text(self, text: str) -> List[Dict[str, str]]:
@@ -1479,3 +1502,14 @@ class TOCParser:
         if children_out:
             section.children = children_out
         return section
+
+
+@functools.lru_cache(maxsize=1)
+def get_toc_parser() -> TOCParser:
+    """
+    Get the process-wide TOC parser instance.
+    
+    TOCParser holds no per-document state after construction, so a single
+    instance is shared by every caller.
+    """
+    return TOCParser()
@@ -29,7 +29,7 @@ class RAGService:
         document_ids: Optional[List[str]] = None,
         model_id: Optional[str] = None,
         max_results: int = 20,
-        min_score: float = 0.7
+        min_score: float = 0.35
     ) -> List[Dict[str, Any]]:
         """
         Search for relevant document passages using RAG
@@ -40,7 +40,7 @@ class RAGService:
             document_ids: Optional list of document IDs to limit search to
             model_id: Embedding model to use for search
             max_results: Maximum number of results to return
-            min_score: Minimum similarity score threshold
+            min_score: Minimum cosine similarity score threshold
             
         Returns:
             List of relevant passages with metadata
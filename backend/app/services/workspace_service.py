@@ -3,6 +3,7 @@ Workspace service for managing document collections
 """
 import os
 import logging
+import uuid
 from typing import List, Optional, Dict, Any
 from werkzeug.datastructures import FileStorage
 from flask import current_app
@@ -154,53 +155,56 @@ class WorkspaceService:
                     'error': 'Only PDF files are supported'
                 }
             
-            # Read file content
-            file_content = file.read()
-            if not file_content:
-                return {
-                    'success': False,
-                    'error': 'Empty file'
-                }
-
-            # Add filename and file size to metadata
-            if not metadata:
-                metadata = {}
-            metadata['filename'] = file.filename
-            metadata['file_size'] = len(file_content)
-
-            # Process document with ingestion service
-            logger.info(f"Starting document ingestion for {file.filename} in workspace {workspace_id}")
+            # Stream the upload to disk and parse it from there, so the PDF is
+            # never held in memory as one bytes object. The file is renamed
+            # once the doc_id is known.
+            from werkzeug.utils import secure_filename
 
-            result = self.ingestion_service.ingest_document_from_bytes(
-                file_content,
-                metadata_override=metadata,
-                embedding_model_id=embedding_model_id
-            )
+            upload_folder = current_app.config['UPLOAD_FOLDER']
+            os.makedirs(upload_folder, exist_ok=True)
+            safe_filename = secure_filename(file.filename)
+            temp_path = os.path.join(upload_folder, f".upload_{uuid.uuid4().hex}_{safe_filename}")
+            try:
+                # Inside the try so a failed or partial save is cleaned up too
+                file.save(temp_path)
 
-            # Save original file to disk after getting doc_id
-            if result and result.success and result.doc_id:
-                import os
-                from werkzeug.utils import secure_filename
-                from flask import current_app
+                file_size = os.path.getsize(temp_path)
+                if not file_size:
+                    return {
+                        'success': False,
+                        'error': 'Empty file'
+                    }
 
-                upload_folder = current_app.config['UPLOAD_FOLDER']
-                os.makedirs(upload_folder, exist_ok=True)
+                # Add filename and file size to metadata
+                if not metadata:
+                    metadata = {}
+                metadata['filename'] = file.filename
+                metadata['file_size'] = file_size
 
-                # Create unique filename using actual doc_id
-                safe_filename = secure_filename(file.filename)
-                unique_filename = f"{result.doc_id}_{safe_filename}"
-                file_path = os.path.join(upload_folder, unique_filename)
+                # Process document with ingestion service
+                logger.info(f"Starting document ingestion for {file.filename} in workspace {workspace_id}")
 
-                # Save file to disk
-                with open(file_path, 'wb') as f:
-                    f.write(file_content)
+                result = self.ingestion_service.ingest_document_from_path(
+                    temp_path,
+                    metadata_override=metadata,
+                    embedding_model_id=embedding_model_id
+                )
 
-                # Update document with file path
-                if result.document:
-                    result.document.file_path = file_path
-                    db.session.commit()
-                    logger.info(f"Updated document {result.doc_id} with file path: {file_path}")
+                # Keep original file on disk after getting doc_id
+                if result and result.success and result.doc_id:
+                    # Create unique filename using actual doc_id
+                    unique_filename = f"{result.doc_id}_{safe_filename}"
+                    file_path = os.path.join(upload_folder, unique_filename)
+                    os.replace(temp_path, file_path)
 
+                    # Update document with file path
+                    if result.document:
+                        result.document.file_path = file_path
+                        db.session.commit()
+                        logger.info(f"Updated document {result.doc_id} with file path: {file_path}")
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
 
             if not result or not result.success:
                 error_msg = result.error_message if result else 'Document processing failed'
@@ -227,7 +231,8 @@ class WorkspaceService:
                 'doc_id': result.doc_id,
                 'document': self._document_to_dict(result.document) if result.document else None,
                 'paragraphs_count': result.paragraphs_count,
-                'processing_time': result.processing_time_seconds
+                'processing_time': result.processing_time_seconds,
+                'embedding_job_id': result.embedding_job_id
             }
             
         except Exception as e: